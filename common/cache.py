@@ -1,31 +1,267 @@
+import asyncio
 import hashlib
+import json
+import logging
+import math
 import pickle
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
+import msgpack
 from django.core.cache import caches
 
 
-def cache_for(seconds, cache_name='default', key_prefix=None, ignore_self=False):
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of what cache_for stores changes, so old entries are simply ignored.
+CACHE_ENTRY_VERSION = 3
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    # How long the value took to compute, used to decide how early to refresh it.
+    delta: float
+    expires_at: float
+
+
+# How cache_for encodes entries before handing them to the cache backend. "raw" leaves the encoding to the
+# backend itself (the Redis backend pickles values), the others encode once and store the resulting string.
+SERIALIZERS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    'raw': (lambda value: value, lambda data: data),
+    'pickle': (pickle.dumps, pickle.loads),
+    'json': (json.dumps, json.loads),
+    'msgpack': (lambda value: msgpack.packb(value, use_bin_type=True), lambda data: msgpack.unpackb(data, raw=False)),
+    'zlib': (lambda value: zlib.compress(pickle.dumps(value)), lambda data: pickle.loads(zlib.decompress(data))),
+}
+
+
+def cache_for(
+    seconds,
+    cache_name='default',
+    key_prefix=None,
+    ignore_self=False,
+    lock_timeout=30,
+    wait_timeout=30,
+    poll_interval=0.1,
+    early_refresh_beta=1.0,
+    negative_ttl=5 * 60,
+    serializer='raw',
+):
+    """
+    Cache the result of the wrapped function for ``seconds``.
+
+    Empty results (``None``, ``{}``, ``[]``, which is also what a failed request turns into) are cached for
+    ``negative_ttl`` seconds instead, so they are not refetched on every call; pass 0 to never cache them.
+    ``serializer`` picks one of ``SERIALIZERS`` to encode entries with.
+
+    Misses are single-flight: the first caller takes a short lock on the key and computes the value while
+    concurrent callers poll for it, falling back to computing it themselves after ``wait_timeout`` seconds.
+    If the lock holder raises, the callers waiting on it raise ``ValueError`` instead of all retrying at once.
+    Hot keys are refreshed before they expire with probability growing as expiry nears (XFetch), scaled by
+    ``early_refresh_beta``; set it to 0 to disable early refresh.
+    """
+    dumps, loads = SERIALIZERS[serializer]
+
     def decorator(fn):
         def wrapper(*args, **kwargs):
             cache = caches[cache_name]
-            if ignore_self:
-                key = generate_cache_key(key_prefix, fn.__name__, *args[1:], **kwargs)
-            else:
-                key = generate_cache_key(key_prefix, fn.__name__, *args, **kwargs)
-            result = cache.get(key=key)
-            if result is None:
-                result = fn(*args, **kwargs)
-                if result:
-                    cache.set(key, pickle.dumps(result), seconds)
-            else:
-                result = pickle.loads(result)
-            return result
+            key = _make_key(fn, key_prefix, ignore_self, args, kwargs)
+
+            entry = _decode_entry(cache.get(key, version=CACHE_ENTRY_VERSION), loads)
+            if entry is not None and not _should_refresh_early(entry, early_refresh_beta):
+                return entry.value
+
+            lock_key, error_key, token = f'{key}:lock', f'{key}:error', uuid.uuid4().hex
+            if cache.add(lock_key, token, lock_timeout, version=CACHE_ENTRY_VERSION):
+                try:
+                    return _compute_and_set(cache, key, seconds, negative_ttl, dumps, fn, *args, **kwargs)
+                except Exception:
+                    # Tells the callers waiting on this token that there is nothing to wait for.
+                    cache.set(error_key, token, lock_timeout, version=CACHE_ENTRY_VERSION)
+                    raise
+                finally:
+                    _release_lock(cache, lock_key, token)
+
+            if entry is not None:
+                # Another caller is already refreshing this key, keep serving the current value meanwhile.
+                return entry.value
+
+            entry = _wait_for_entry(cache, key, lock_key, error_key, loads, wait_timeout, poll_interval)
+            if entry is not None:
+                return entry.value
+            return _compute_and_set(cache, key, seconds, negative_ttl, dumps, fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def acache_for(
+    seconds,
+    cache_name='default',
+    key_prefix=None,
+    ignore_self=False,
+    lock_timeout=30,
+    wait_timeout=30,
+    poll_interval=0.1,
+    early_refresh_beta=1.0,
+    negative_ttl=5 * 60,
+    serializer='raw',
+):
+    """
+    Async counterpart of ``cache_for`` for coroutine functions.
+
+    Keys and entries are shared with ``cache_for``, so a coroutine named like a cached sync function reads
+    and writes the same entries.
+    """
+    dumps, loads = SERIALIZERS[serializer]
+
+    def decorator(fn):
+        async def wrapper(*args, **kwargs):
+            cache = caches[cache_name]
+            key = _make_key(fn, key_prefix, ignore_self, args, kwargs)
+
+            entry = _decode_entry(await cache.aget(key, version=CACHE_ENTRY_VERSION), loads)
+            if entry is not None and not _should_refresh_early(entry, early_refresh_beta):
+                return entry.value
+
+            lock_key, error_key, token = f'{key}:lock', f'{key}:error', uuid.uuid4().hex
+            if await cache.aadd(lock_key, token, lock_timeout, version=CACHE_ENTRY_VERSION):
+                try:
+                    return await _acompute_and_set(cache, key, seconds, negative_ttl, dumps, fn, *args, **kwargs)
+                except Exception:
+                    await cache.aset(error_key, token, lock_timeout, version=CACHE_ENTRY_VERSION)
+                    raise
+                finally:
+                    await _arelease_lock(cache, lock_key, token)
+
+            if entry is not None:
+                return entry.value
+
+            entry = await _await_entry(cache, key, lock_key, error_key, loads, wait_timeout, poll_interval)
+            if entry is not None:
+                return entry.value
+            return await _acompute_and_set(cache, key, seconds, negative_ttl, dumps, fn, *args, **kwargs)
 
         return wrapper
 
     return decorator
 
 
+def _make_key(fn: Callable, key_prefix, ignore_self, args, kwargs) -> str:
+    if ignore_self:
+        return generate_cache_key(key_prefix, fn.__name__, *args[1:], **kwargs)
+    return generate_cache_key(key_prefix, fn.__name__, *args, **kwargs)
+
+
+def _decode_entry(result, loads: Callable[[Any], Any]) -> Optional[CacheEntry]:
+    if result is None:
+        return None
+    return CacheEntry(*loads(result))
+
+
+def _encode_entry(result, started_at: float, finished_at: float, seconds, negative_ttl, dumps: Callable[[Any], Any]):
+    """Return the encoded entry and its TTL, or ``(None, 0)`` when the result should not be cached."""
+    ttl = seconds if result else negative_ttl
+    if not ttl:
+        return None, 0
+    return dumps(tuple(CacheEntry(result, finished_at - started_at, finished_at + ttl))), ttl
+
+
+def _should_refresh_early(entry: CacheEntry, beta: float) -> bool:
+    if beta <= 0:
+        return False
+    return time.time() - entry.delta * beta * math.log(1 - random.random()) >= entry.expires_at
+
+
+def _compute_and_set(
+    cache, key: str, seconds, negative_ttl, dumps: Callable[[Any], Any], fn: Callable, *args, **kwargs
+) -> Any:
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    data, ttl = _encode_entry(result, started_at, time.time(), seconds, negative_ttl, dumps)
+    if ttl:
+        cache.set(key, data, ttl, version=CACHE_ENTRY_VERSION)
+    return result
+
+
+async def _acompute_and_set(
+    cache, key: str, seconds, negative_ttl, dumps: Callable[[Any], Any], fn: Callable, *args, **kwargs
+) -> Any:
+    started_at = time.time()
+    result = await fn(*args, **kwargs)
+    data, ttl = _encode_entry(result, started_at, time.time(), seconds, negative_ttl, dumps)
+    if ttl:
+        await cache.aset(key, data, ttl, version=CACHE_ENTRY_VERSION)
+    return result
+
+
+def _release_lock(cache, lock_key: str, token: str):
+    """
+    Delete the lock only if it still holds ``token``. A holder that outlived ``lock_timeout`` must not release the
+    lock of the caller that took it over; the cache API has no compare-and-delete, so a takeover between the get
+    and the delete can still slip through.
+    """
+    if cache.get(lock_key, version=CACHE_ENTRY_VERSION) == token:
+        cache.delete(lock_key, version=CACHE_ENTRY_VERSION)
+
+
+async def _arelease_lock(cache, lock_key: str, token: str):
+    if await cache.aget(lock_key, version=CACHE_ENTRY_VERSION) == token:
+        await cache.adelete(lock_key, version=CACHE_ENTRY_VERSION)
+
+
+def _wait_for_entry(
+    cache, key: str, lock_key: str, error_key: str, loads: Callable[[Any], Any], wait_timeout, poll_interval
+) -> Optional[CacheEntry]:
+    deadline = time.monotonic() + wait_timeout
+    holder = cache.get(lock_key, version=CACHE_ENTRY_VERSION)
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        entry = _decode_entry(cache.get(key, version=CACHE_ENTRY_VERSION), loads)
+        if entry is not None:
+            return entry
+        current = cache.get(lock_key, version=CACHE_ENTRY_VERSION)
+        if current is not None and current == holder:
+            continue
+        if holder is not None and cache.get(error_key, version=CACHE_ENTRY_VERSION) == holder:
+            raise ValueError(f"Computing cache key {key} failed in the caller holding its lock")
+        if current is None:
+            # The lock holder finished without caching anything.
+            return None
+        # The lock expired and another caller took it over, wait for that one instead.
+        holder = current
+    logger.warning(f"Timed out waiting for cache key {key} to be computed")
+    return None
+
+
+async def _await_entry(
+    cache, key: str, lock_key: str, error_key: str, loads: Callable[[Any], Any], wait_timeout, poll_interval
+) -> Optional[CacheEntry]:
+    deadline = time.monotonic() + wait_timeout
+    holder = await cache.aget(lock_key, version=CACHE_ENTRY_VERSION)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(poll_interval)
+        entry = _decode_entry(await cache.aget(key, version=CACHE_ENTRY_VERSION), loads)
+        if entry is not None:
+            return entry
+        current = await cache.aget(lock_key, version=CACHE_ENTRY_VERSION)
+        if current is not None and current == holder:
+            continue
+        if holder is not None and await cache.aget(error_key, version=CACHE_ENTRY_VERSION) == holder:
+            raise ValueError(f"Computing cache key {key} failed in the caller holding its lock")
+        if current is None:
+            return None
+        holder = current
+    logger.warning(f"Timed out waiting for cache key {key} to be computed")
+    return None
+
+
 def generate_cache_key(key_prefix, *args, **kwargs) -> str:
     serialise = []
     for arg in args:
@@ -39,3 +275,66 @@ def generate_cache_key(key_prefix, *args, **kwargs) -> str:
         return f'{key_prefix}:{key}'
     else:
         return key
+
+
+class LocalCache:
+    """
+    Bounded in-process cache that evicts the least recently used entry once full and expires entries after a TTL.
+
+    It is meant as an L1 tier in front of the shared cache, so it never needs to be invalidated explicitly:
+    the TTL bounds how stale a worker can get.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[int] = 60 * 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        res = dict()
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    self._data.move_to_end(key)
+                    res[key] = entry[0]
+                    self.hits += 1
+                else:
+                    if entry is not None:
+                        del self._data[key]
+                    self.misses += 1
+        return res
+
+    def set_many(self, data: Dict[str, Any]):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            for key, value in data.items():
+                self._data[key] = (value, expires_at)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "max_size": self.max_size}
+
+
+_local_caches: Dict[str, LocalCache] = dict()
+_local_caches_lock = threading.Lock()
+
+
+def get_local_cache(name: str, max_size: int = 1024, ttl: Optional[int] = 60 * 60) -> LocalCache:
+    """Return the process-wide local cache registered under ``name``, creating it on first use."""
+    with _local_caches_lock:
+        if name not in _local_caches:
+            _local_caches[name] = LocalCache(max_size, ttl)
+        return _local_caches[name]
@@ -1,21 +1,190 @@
-import requests
+import asyncio
 import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 logger = logging.getLogger(__name__)
 
-class RestClient:
-    def __init__(self, base_url: str):
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Called after every request with (method, url, status_code, elapsed_seconds); status_code is None on failure.
+ResponseHook = Callable[[str, str, Optional[int], float], None]
+
+
+class TrackedRequest:
+    """Bookkeeping of a single get_json_response call: its URL once formatted and the status code it got."""
+
+    def __init__(self, base_url: str, url: str, url_params: Optional[dict]):
         self.base_url = base_url
+        self.path = url
+        self.url_params = url_params
+        # Left unformatted until full_url succeeds, so a formatting error is still logged against the URL.
+        self.url = base_url + url
+        self.status_code = None
 
-    def get_json_response(self, url: str, method: str = 'GET', url_params: dict = None, data: dict = None, headers: dict = None, params: dict = None, timeout: int = 10) -> dict:
+    def full_url(self) -> str:
+        self.url = self.base_url + self.path.format(**(self.url_params or {}))
+        return self.url
+
+    def parse_json(self, response) -> dict:
+        self.status_code = response.status_code
         try:
-            full_url = self.base_url + url.format(**(url_params or {}))
-            response = requests.request(method, full_url, json=data, headers=headers, params=params, timeout=timeout)
             return response.json()
-        except requests.exceptions.JSONDecodeError as e:
-            logger.error(f"Failed to parse json response with status code {response.status_code} from url {full_url}: {response.text}")
+        except ValueError:
+            logger.error(f"Failed to parse json response with status code {response.status_code} from url {self.url}: {response.text}")
             return dict()
+
+
+class BaseRestClient:
+    """What RestClient and AsyncRestClient share: default headers, error logging and the response hook."""
+
+    def __init__(self, base_url: str, response_hook: Optional[ResponseHook] = None):
+        self.base_url = base_url
+        self.response_hook = response_hook
+
+    def get_default_headers(self) -> dict:
+        """Headers sent with every request, under the ones passed to get_json_response."""
+        return dict()
+
+    def _get_headers(self, headers: Optional[dict]) -> dict:
+        return {**self.get_default_headers(), **(headers or {})}
+
+    def _on_response(self, method: str, url: str, status_code: Optional[int], elapsed: float):
+        logger.debug(f"{method} {url} returned {status_code} in {elapsed:.3f}s")
+        if self.response_hook is not None:
+            try:
+                self.response_hook(method, url, status_code, elapsed)
+            except Exception as e:
+                logger.error(f"Response hook failed for {url}: {e}")
+
+    @contextmanager
+    def _track_request(self, method: str, url: str, url_params: Optional[dict]):
+        """
+        Yield the TrackedRequest of a call. Errors raised in the block are logged instead of propagated, so the
+        caller falls through to its empty result, and the response hook runs however the request ended.
+        """
+        request = TrackedRequest(self.base_url, url, url_params)
+        started_at = time.perf_counter()
+        try:
+            yield request
         except Exception as e:
-            logger.error(f"An error occured whilte trying to get json response from {full_url}: {e}")
-            return dict()
\ No newline at end of file
+            logger.error(f"An error occured whilte trying to get json response from {request.url}: {e}")
+        finally:
+            self._on_response(method, request.url, request.status_code, time.perf_counter() - started_at)
+
+
+class RestClient(BaseRestClient):
+    def __init__(
+        self,
+        base_url: str,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+        response_hook: Optional[ResponseHook] = None,
+    ):
+        super().__init__(base_url, response_hook)
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json_response(self, url: str, method: str = 'GET', url_params: dict = None, data: dict = None, headers: dict = None, params: dict = None, timeout: int = 10) -> dict:
+        with self._track_request(method, url, url_params) as request:
+            response = self.session.request(
+                method,
+                request.full_url(),
+                json=data,
+                headers=self._get_headers(headers),
+                params=params,
+                timeout=timeout,
+            )
+            return request.parse_json(response)
+        return dict()
+
+
+class AsyncRestClient(BaseRestClient):
+    """
+    asyncio counterpart of RestClient, meant to be used as an async context manager.
+
+    Concurrent requests to the host are capped at ``max_concurrency``; 429/5xx responses and transport errors
+    are retried with exponential backoff and jitter like RestClient does.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_concurrency: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+        response_hook: Optional[ResponseHook] = None,
+    ):
+        super().__init__(base_url, response_hook)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.client = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        self.client = httpx.AsyncClient(limits=limits)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+        self.semaphore = None
+
+    def _get_backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_jitter)
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                async with self.semaphore:
+                    response = await self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    return response
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(self._get_backoff(attempt, response))
+
+    async def get_json_response(self, url: str, method: str = 'GET', url_params: dict = None, data: dict = None, headers: dict = None, params: dict = None, timeout: int = 10) -> dict:
+        with self._track_request(method, url, url_params) as request:
+            response = await self._request(
+                method,
+                request.full_url(),
+                json=data,
+                headers=self._get_headers(headers),
+                params=params,
+                timeout=timeout,
+            )
+            return request.parse_json(response)
+        return dict()
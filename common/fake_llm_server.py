@@ -0,0 +1,199 @@
+import email
+import email.policy
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+class FakeLLMRequestHandler(BaseHTTPRequestHandler):
+    server: "FakeLLMHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, data: Dict[str, Any], status: int = 200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_uploaded_file(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        message = email.message_from_bytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + self.rfile.read(length),
+            policy=email.policy.HTTP,
+        )
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                return part.get_payload(decode=True)
+        return b""
+
+    def do_POST(self):
+        if self.path.endswith("/files"):
+            self._send_json(self.server.create_file(self._read_uploaded_file(), "batch"))
+            return
+
+        payload = self._read_json()
+        if self.path.endswith("/batches"):
+            self._send_json(self.server.create_batch(payload))
+            return
+
+        time.sleep(self.server.latency)
+        if self.path.endswith("/responses"):
+            self._send_json(self.server.build_response(payload))
+        elif self.path.endswith("/chat/completions"):
+            self._send_json(self.server.build_chat_completion(payload))
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+    def do_GET(self):
+        parts = self.path.rstrip("/").split("/")
+        if parts[-3:-1] == ["v1", "batches"] and parts[-1] in self.server.batches:
+            self._send_json(self.server.batches[parts[-1]])
+        elif parts[-1] == "content" and parts[-2] in self.server.files:
+            body = self.server.files[parts[-2]]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+
+class FakeLLMHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float, answer: Dict[str, Any]):
+        super().__init__(address, FakeLLMRequestHandler)
+        self.latency = latency
+        self.answer = json.dumps(answer)
+        self.files: Dict[str, bytes] = dict()
+        self.batches: Dict[str, Dict[str, Any]] = dict()
+
+    def create_file(self, content: bytes, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def create_batch(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer every request of the batch right away, so it is already completed when first polled."""
+        output = []
+        for line in self.files[payload["input_file_id"]].decode("utf-8").splitlines():
+            request = json.loads(line)
+            output.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": self.build_chat_completion(request["body"])},
+                        "error": None,
+                    }
+                )
+            )
+        output_file = self.create_file("\n".join(output).encode("utf-8"), "batch_output")
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex}",
+            "object": "batch",
+            "endpoint": payload["endpoint"],
+            "input_file_id": payload["input_file_id"],
+            "completion_window": payload["completion_window"],
+            "status": "completed",
+            "output_file_id": output_file["id"],
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "request_counts": {"total": len(output), "completed": len(output), "failed": 0},
+        }
+        self.batches[batch["id"]] = batch
+        return batch
+
+    def build_usage(self) -> Dict[str, Any]:
+        return {"input_tokens": 100, "output_tokens": 10, "total_tokens": 110}
+
+    def build_response(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": payload.get("model"),
+            "status": "completed",
+            "output": [
+                {
+                    "type": "message",
+                    "id": f"msg_{uuid.uuid4().hex}",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [{"type": "output_text", "text": self.answer, "annotations": []}],
+                }
+            ],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                **self.build_usage(),
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens_details": {"reasoning_tokens": 0},
+            },
+        }
+
+    def build_chat_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.answer},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 10, "total_tokens": 110},
+        }
+
+
+class FakeLLMServer:
+    """
+    Minimal OpenAI-compatible server for benchmarks and local checks.
+
+    Every completion answers with ``answer`` encoded as JSON after ``latency`` seconds, so it can stand in for a
+    provider behind any structured output model whose schema ``answer`` satisfies. It also implements enough of
+    the files and batches endpoints to run BatchLLMCaller against it.
+    """
+
+    def __init__(self, latency: float = 0.5, answer: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = FakeLLMHTTPServer((host, port), latency, answer or {"answer": "ok"})
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
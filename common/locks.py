@@ -0,0 +1,82 @@
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import cache
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def get_redis_client(cache_name: str = "default") -> redis.Redis:
+    return redis.Redis.from_url(settings.CACHES[cache_name]["LOCATION"])
+
+
+class DistributedLock:
+    """
+    Redis lock held for a lease that expires unless it is extended.
+
+    The lock is identified by a random token rather than by the process holding it, so it can be handed over
+    between tasks (e.g. acquired by one celery task and released by a chord callback) by passing the token along.
+    """
+
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    EXTEND_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        if redis.call('pttl', KEYS[1]) < tonumber(ARGV[2]) then
+            redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, name: str, lease: int = 10 * 60, token: Optional[str] = None, cache_name: str = "default"):
+        self.key = f"lock:{name}"
+        self.lease = lease
+        self.token = token or uuid.uuid4().hex
+        self.client = get_redis_client(cache_name)
+
+    def acquire(self) -> bool:
+        return bool(self.client.set(self.key, self.token, nx=True, px=self.lease * 1000))
+
+    def extend(self, lease: Optional[int] = None) -> bool:
+        """Make the lock last at least ``lease`` seconds (the default lease) from now; a longer lease is kept."""
+        lease = lease or self.lease
+        return bool(self.client.eval(self.EXTEND_SCRIPT, 1, self.key, self.token, lease * 1000))
+
+    def release(self) -> bool:
+        return bool(self.client.eval(self.RELEASE_SCRIPT, 1, self.key, self.token))
+
+    @contextmanager
+    def heartbeat(self, interval: Optional[float] = None):
+        """Keep extending the lease in a background thread while the block runs."""
+        interval = interval or self.lease / 3
+        stopped = threading.Event()
+
+        def beat():
+            while not stopped.wait(interval):
+                try:
+                    if not self.extend():
+                        logger.warning(f"Lost lock {self.key} before the work holding it finished")
+                        return
+                except redis.RedisError as e:
+                    logger.error(f"Failed to extend lock {self.key}: {e}")
+
+        thread = threading.Thread(target=beat, name=f"heartbeat:{self.key}", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stopped.set()
+            thread.join()
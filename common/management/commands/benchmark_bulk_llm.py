@@ -0,0 +1,94 @@
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from langchain.messages import SystemMessage, HumanMessage
+from pydantic import BaseModel, ConfigDict
+
+from common.fake_llm_server import FakeLLMServer
+from common.services import BulkLLMCaller, BatchLLMCaller
+
+
+BATCH_ENGINE = "batch"
+
+
+class Answer(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    answer: str
+
+
+class ThreadCountSampler:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+class Command(BaseCommand):
+    help = "Compare BulkLLMCaller engines (throughput, memory, threads) against a local fake LLM server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=200, help="Number of LLM calls per run")
+        parser.add_argument("--concurrency", type=int, default=50, help="max_concurrency of BulkLLMCaller")
+        parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM response latency in seconds")
+        parser.add_argument(
+            "--engines",
+            nargs="+",
+            default=[BulkLLMCaller.THREAD_ENGINE, BulkLLMCaller.ASYNC_ENGINE],
+            choices=[BulkLLMCaller.THREAD_ENGINE, BulkLLMCaller.ASYNC_ENGINE, BATCH_ENGINE],
+            help="Engines to benchmark; 'batch' runs BatchLLMCaller against the server's batch endpoint",
+        )
+
+    def build_caller(self, engine: str, tasks: int, concurrency: int):
+        if engine == BATCH_ENGINE:
+            caller = BatchLLMCaller(Answer, "fake-model", poll_interval=0.1)
+        else:
+            caller = BulkLLMCaller(Answer, "fake-model", max_concurrency=concurrency, engine=engine)
+        for i in range(tasks):
+            caller.add_task([SystemMessage(content="Answer the question."), HumanMessage(content=f"Question {i}")])
+        return caller
+
+    def run_engine(self, engine: str, tasks: int, concurrency: int):
+        # tracemalloc hooks every allocation and slows the thread engine far more than the async one, so wall time
+        # and memory are measured in separate runs.
+        caller = self.build_caller(engine, tasks, concurrency)
+        with ThreadCountSampler() as sampler:
+            started_at = time.perf_counter()
+            resps = caller.call()
+            elapsed = time.perf_counter() - started_at
+
+        caller = self.build_caller(engine, tasks, concurrency)
+        tracemalloc.start()
+        try:
+            caller.call()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        failed = sum(1 for resp in resps if resp["parsed"] is None)
+        self.stdout.write(
+            f"{engine}: {elapsed:.2f}s, {tasks / elapsed:.1f} calls/s, failed: {failed}, "
+            f"peak traced memory: {peak_memory / 1024 / 1024:.1f}MiB, peak threads: {sampler.peak}"
+        )
+
+    def handle(self, *args, **options):
+        with FakeLLMServer(latency=options["latency"]) as server:
+            llm_settings = {"default": {"base_url": server.base_url, "api_key": "fake"}}
+            with override_settings(LLM_SETTINGS=llm_settings):
+                for engine in options["engines"]:
+                    self.run_engine(engine, options["tasks"], options["concurrency"])
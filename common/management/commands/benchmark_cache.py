@@ -0,0 +1,73 @@
+import time
+from collections import Counter
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from common.services import CacheService
+
+
+class RoundTripCountingCache(LocMemCache):
+    """In-memory cache that counts every call that would be a network round trip on Redis."""
+
+    def __init__(self):
+        super().__init__("benchmark-cache", {"OPTIONS": {"MAX_ENTRIES": 10**7}})
+        self.round_trips = Counter()
+        self._in_bulk_call = False
+
+    def _count(self, operation: str):
+        if not self._in_bulk_call:
+            self.round_trips[operation] += 1
+
+    def get(self, *args, **kwargs):
+        self._count("get")
+        return super().get(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        self._count("get_many")
+        self._in_bulk_call = True
+        try:
+            return super().get_many(*args, **kwargs)
+        finally:
+            self._in_bulk_call = False
+
+    def set(self, *args, **kwargs):
+        self._count("set")
+        return super().set(*args, **kwargs)
+
+    def set_many(self, *args, **kwargs):
+        self._count("set_many")
+        self._in_bulk_call = True
+        try:
+            return super().set_many(*args, **kwargs)
+        finally:
+            self._in_bulk_call = False
+
+
+class Command(BaseCommand):
+    help = "Count cache round trips made by CacheService for a get-or-create lookup over many keys"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keys", type=int, default=1000, help="Number of keys to look up")
+        parser.add_argument("--hit-ratio", type=float, default=0.5, help="Fraction of keys already cached")
+
+    def handle(self, *args, **options):
+        keys = [f"job-{i}" for i in range(options["keys"])]
+        cached_count = int(len(keys) * options["hit_ratio"])
+
+        cache_service = CacheService(prefix="benchmark")
+        cache_service.cache = RoundTripCountingCache()
+        cache_service.set_cache_values(keys[:cached_count], keys[:cached_count])
+        cache_service.cache.round_trips.clear()
+
+        started_at = time.perf_counter()
+        items, uncached_keys = cache_service.get_cached_items(keys)
+        cache_service.set_cache_values(uncached_keys, uncached_keys)
+        elapsed = time.perf_counter() - started_at
+
+        round_trips = cache_service.cache.round_trips
+        self.stdout.write(f"keys: {len(keys)} (hits: {len(items)}, misses: {len(uncached_keys)})")
+        for operation, count in sorted(round_trips.items()):
+            self.stdout.write(f"{operation}: {count}")
+        self.stdout.write(f"total round trips: {sum(round_trips.values())}")
+        self.stdout.write(f"elapsed: {elapsed * 1000:.2f}ms")
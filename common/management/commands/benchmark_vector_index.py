@@ -0,0 +1,180 @@
+import statistics
+import time
+from typing import List, Set
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+TABLE_NAME = "benchmark_vector_index"
+EXACT_TABLE_NAME = "benchmark_vector_index_exact"
+QUERIES_TABLE_NAME = "benchmark_vector_index_queries"
+CENTERS_TABLE_NAME = "benchmark_vector_index_centers"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure recall and latency of the shipped embedding layout (a halfvec column with a halfvec_cosine_ops "
+        "HNSW index) against exact full-precision kNN on synthetic embeddings, at growing table sizes. Needs "
+        f"PostgreSQL with pgvector >= 0.7 and creates (then drops) the {TABLE_NAME}* tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Table sizes")
+        # Defaults follow jobs.Opportunity, the largest embedded table.
+        parser.add_argument("--dimensions", type=int, default=1024, help="Embedding dimensions")
+        parser.add_argument("--queries", type=int, default=100, help="Number of probe vectors (at least 2)")
+        parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+        parser.add_argument("--clusters", type=int, default=1000, help="Clusters the synthetic embeddings fall into")
+        parser.add_argument(
+            "--noise", type=float, default=0.5, help="Distance of the embeddings from their cluster center"
+        )
+        parser.add_argument("--ef-search", type=int, default=100, help="hnsw.ef_search for the index queries")
+        parser.add_argument("--m", type=int, default=24, help="HNSW m")
+        parser.add_argument("--ef-construction", type=int, default=128, help="HNSW ef_construction")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Rows inserted per statement")
+
+    def _random_vectors_sql(self, source: str) -> str:
+        """Select statement yielding one normalized vector near a random cluster center per row of ``source``."""
+        dimensions = self.options["dimensions"]
+        # Scaled so that --noise is the length of the offset from the center, whatever the dimensions.
+        noise = self.options["noise"] * (12 / dimensions) ** 0.5
+        return f"""
+            SELECT l2_normalize(
+                center.embedding + (
+                    SELECT array_agg(({noise} * (random() - 0.5))::real)::vector({dimensions})
+                    FROM generate_series(1, {dimensions}) AS d(i)
+                    WHERE d.i > source.i * 0
+                )
+            )
+            FROM (
+                SELECT i, 1 + floor(random() * {self.options["clusters"]})::int AS center_id FROM {source} AS s(i)
+            ) AS source
+            JOIN {CENTERS_TABLE_NAME} AS center ON center.id = source.center_id
+        """
+
+    def _setup(self, cursor):
+        dimensions = self.options["dimensions"]
+        self._teardown(cursor)
+        cursor.execute(
+            f"CREATE UNLOGGED TABLE {CENTERS_TABLE_NAME} (id integer PRIMARY KEY, embedding vector({dimensions}))"
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {CENTERS_TABLE_NAME}
+            SELECT c.i, l2_normalize(
+                (
+                    SELECT array_agg((random() - 0.5)::real)::vector({dimensions})
+                    FROM generate_series(1, {dimensions}) AS d(i)
+                    WHERE d.i > c.i * 0
+                )
+            )
+            FROM generate_series(1, %s) AS c(i)
+            """,
+            [self.options["clusters"]],
+        )
+        # The full-precision copy only serves as ground truth; the benchmarked table stores what the models do.
+        for table in [EXACT_TABLE_NAME, QUERIES_TABLE_NAME]:
+            cursor.execute(f"CREATE UNLOGGED TABLE {table} (id bigserial PRIMARY KEY, embedding vector({dimensions}))")
+        cursor.execute(f"CREATE UNLOGGED TABLE {TABLE_NAME} (id bigint PRIMARY KEY, embedding halfvec({dimensions}))")
+        queries = self.options["queries"]
+        cursor.execute(
+            f"INSERT INTO {QUERIES_TABLE_NAME} (embedding) {self._random_vectors_sql(f'generate_series(1, {queries})')}"
+        )
+
+    def _teardown(self, cursor):
+        for table in [TABLE_NAME, EXACT_TABLE_NAME, QUERIES_TABLE_NAME, CENTERS_TABLE_NAME]:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def _grow(self, cursor, rows: int):
+        dimensions = self.options["dimensions"]
+        cursor.execute(f"SELECT count(*) FROM {TABLE_NAME}")
+        count = cursor.fetchone()[0]
+        while count < rows:
+            batch = min(self.options["batch_size"], rows - count)
+            cursor.execute(
+                f"INSERT INTO {EXACT_TABLE_NAME} (embedding) {self._random_vectors_sql(f'generate_series(1, {batch})')}"
+            )
+            cursor.execute(
+                f"INSERT INTO {TABLE_NAME} (id, embedding) "
+                f"SELECT id, embedding::halfvec({dimensions}) FROM {EXACT_TABLE_NAME} "
+                f"WHERE id > (SELECT coalesce(max(id), 0) FROM {TABLE_NAME})"
+            )
+            count += batch
+            self.stdout.write(f"  inserted {count}/{rows} rows", ending="\r")
+        self.stdout.write("")
+
+    def _build_index(self, cursor) -> float:
+        cursor.execute(f"DROP INDEX IF EXISTS {TABLE_NAME}_hnsw")
+        started_at = time.perf_counter()
+        cursor.execute(
+            f"CREATE INDEX {TABLE_NAME}_hnsw ON {TABLE_NAME} USING hnsw (embedding halfvec_cosine_ops) "
+            f"WITH (m = {self.options['m']}, ef_construction = {self.options['ef_construction']})"
+        )
+        return time.perf_counter() - started_at
+
+    def _search(self, cursor, sql: str, probes: List[str]):
+        latencies = []
+        results = []
+        for probe in probes:
+            started_at = time.perf_counter()
+            cursor.execute(sql, [probe, self.options["k"]])
+            results.append({row[0] for row in cursor.fetchall()})
+            latencies.append(time.perf_counter() - started_at)
+        return results, latencies
+
+    def _describe_latencies(self, latencies: List[float]) -> str:
+        percentiles = statistics.quantiles(latencies, n=100)
+        p50, p95 = percentiles[49], percentiles[94]
+        return f"p50 {p50 * 1000:.2f}ms, p95 {p95 * 1000:.2f}ms"
+
+    def _recall(self, found: List[Set[int]], exact: List[Set[int]]) -> float:
+        return statistics.mean(
+            len(items & expected) / len(expected) for items, expected in zip(found, exact) if expected
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        dimensions = options["dimensions"]
+        exact_sql = f"SELECT id FROM {EXACT_TABLE_NAME} ORDER BY embedding <=> %s::vector({dimensions}) LIMIT %s"
+        # The same query runs as an exact scan before the index is built and through the index afterwards.
+        halfvec_sql = f"SELECT id FROM {TABLE_NAME} ORDER BY embedding <=> %s::halfvec({dimensions}) LIMIT %s"
+
+        with connection.cursor() as cursor:
+            self._setup(cursor)
+            try:
+                cursor.execute(f"SELECT embedding::text FROM {QUERIES_TABLE_NAME} ORDER BY id")
+                probes = [row[0] for row in cursor.fetchall()]
+                cursor.execute("SELECT set_config('hnsw.ef_search', %s, false)", [str(options["ef_search"])])
+
+                for rows in sorted(options["rows"]):
+                    self.stdout.write(f"rows: {rows}")
+                    self._grow(cursor, rows)
+                    cursor.execute(f"DROP INDEX IF EXISTS {TABLE_NAME}_hnsw")
+                    exact, _ = self._search(cursor, exact_sql, probes)
+                    scanned, scan_latencies = self._search(cursor, halfvec_sql, probes)
+
+                    build_time = self._build_index(cursor)
+                    cursor.execute(f"ANALYZE {TABLE_NAME}")
+                    approximate, index_latencies = self._search(cursor, halfvec_sql, probes)
+                    # halfvec(1024) and wider rows are TOASTed, so the table size has to include its TOAST table.
+                    cursor.execute(
+                        "SELECT pg_table_size(%s), pg_relation_size(%s)", [TABLE_NAME, f"{TABLE_NAME}_hnsw"]
+                    )
+                    table_size, index_size = cursor.fetchone()
+
+                    k = options["k"]
+                    self.stdout.write(
+                        f"  exact halfvec scan: {self._describe_latencies(scan_latencies)}, "
+                        f"recall@{k} {self._recall(scanned, exact):.3f}"
+                    )
+                    self.stdout.write(
+                        f"  halfvec hnsw: {self._describe_latencies(index_latencies)}, "
+                        f"recall@{k} {self._recall(approximate, exact):.3f}"
+                    )
+                    self.stdout.write(
+                        f"  index build: {build_time:.1f}s, table: {table_size / 2**20:.0f}MiB, "
+                        f"index: {index_size / 2**20:.0f}MiB"
+                    )
+            finally:
+                self._teardown(cursor)
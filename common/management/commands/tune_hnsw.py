@@ -0,0 +1,123 @@
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from pgvector.django import HnswIndex
+
+
+TABLE_NAME = "tune_hnsw"
+
+
+class Command(BaseCommand):
+    help = (
+        "Pick HNSW parameters for an embedded model: copies its embeddings to a scratch table, builds an index per "
+        "m/ef_construction pair and reports recall@k and latency of every ef_search against exact search"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", help="Embedded model as app_label.ModelName, e.g. jobs.Opportunity")
+        parser.add_argument("--rows", type=int, default=None, help="Copy at most this many rows (default: all)")
+        parser.add_argument("--queries", type=int, default=100, help="Number of rows used as probes (at least 2)")
+        parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+        parser.add_argument("--m", type=int, nargs="+", default=[16, 24], help="HNSW m values")
+        parser.add_argument("--ef-construction", type=int, nargs="+", default=[64, 128], help="ef_construction values")
+        parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 100, 200], help="ef_search values")
+        parser.add_argument("--target-recall", type=float, default=0.95, help="Recall the recommendation must reach")
+
+    def _get_opclass(self, model, embedding_type: str) -> str:
+        for index in model._meta.indexes:
+            if isinstance(index, HnswIndex) and index.fields == ["embedding"]:
+                return index.opclasses[0]
+        return "halfvec_cosine_ops" if embedding_type.startswith("halfvec") else "vector_cosine_ops"
+
+    def _search(self, cursor, sql: str, probes: List[Tuple[int, str]], k: int, ef_search: Optional[int] = None):
+        results = []
+        latencies = []
+        for probe_id, probe in probes:
+            started_at = time.perf_counter()
+            with transaction.atomic():
+                if ef_search:
+                    cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", [str(ef_search)])
+                cursor.execute(sql, [probe_id, probe, k])
+                results.append({row[0] for row in cursor.fetchall()})
+            latencies.append(time.perf_counter() - started_at)
+        return results, latencies
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(f"Unknown model {options['model']}: {e}")
+
+        embedding_type = model._meta.get_field("embedding").db_type(connection)
+        opclass = self._get_opclass(model, embedding_type)
+        k = options["k"]
+        search_sql = f"SELECT id FROM {TABLE_NAME} WHERE id <> %s ORDER BY embedding <=> %s::{embedding_type} LIMIT %s"
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE {TABLE_NAME} AS "
+                f"SELECT {connection.ops.quote_name(model._meta.pk.column)} AS id, embedding "
+                f"FROM {connection.ops.quote_name(model._meta.db_table)} WHERE embedding IS NOT NULL LIMIT %s",
+                [options["rows"]],
+            )
+            try:
+                cursor.execute(f"SELECT count(*) FROM {TABLE_NAME}")
+                rows = cursor.fetchone()[0]
+                cursor.execute(
+                    f"SELECT id, embedding::text FROM {TABLE_NAME} ORDER BY random() LIMIT %s", [options["queries"]]
+                )
+                probes = cursor.fetchall()
+                if len(probes) < 2:
+                    raise CommandError(f"{model.__name__} has fewer than 2 embedded rows")
+                self.stdout.write(f"{model.__name__}: {rows} rows, {len(probes)} probes, {embedding_type} {opclass}")
+
+                exact, exact_latencies = self._search(cursor, search_sql, probes, k)
+                self.stdout.write(f"exact: p50 {statistics.median(exact_latencies) * 1000:.2f}ms")
+
+                results = []
+                for m in options["m"]:
+                    for ef_construction in options["ef_construction"]:
+                        cursor.execute(f"DROP INDEX IF EXISTS {TABLE_NAME}_hnsw")
+                        started_at = time.perf_counter()
+                        cursor.execute(
+                            f"CREATE INDEX {TABLE_NAME}_hnsw ON {TABLE_NAME} USING hnsw (embedding {opclass}) "
+                            f"WITH (m = {m}, ef_construction = {ef_construction})"
+                        )
+                        build_time = time.perf_counter() - started_at
+                        cursor.execute("SELECT pg_relation_size(%s)", [f"{TABLE_NAME}_hnsw"])
+                        index_size = cursor.fetchone()[0]
+                        cursor.execute(f"ANALYZE {TABLE_NAME}")
+
+                        for ef_search in options["ef_search"]:
+                            found, latencies = self._search(cursor, search_sql, probes, k, max(ef_search, k))
+                            recall = statistics.mean(
+                                len(approximate & expected) / len(expected)
+                                for approximate, expected in zip(found, exact)
+                                if expected
+                            )
+                            p50 = statistics.median(latencies)
+                            p95 = statistics.quantiles(latencies, n=100)[94]
+                            results.append((m, ef_construction, ef_search, recall, p50))
+                            self.stdout.write(
+                                f"m={m} ef_construction={ef_construction} ef_search={ef_search}: "
+                                f"recall@{k} {recall:.3f}, p50 {p50 * 1000:.2f}ms, p95 {p95 * 1000:.2f}ms, "
+                                f"build {build_time:.1f}s, index {index_size / 2**20:.0f}MiB"
+                            )
+            finally:
+                cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+
+        candidates = [result for result in results if result[3] >= options["target_recall"]]
+        if not candidates:
+            self.stdout.write(f"No combination reached recall {options['target_recall']}, try larger values")
+            return
+        m, ef_construction, ef_search, recall, p50 = min(candidates, key=lambda result: result[4])
+        self.stdout.write(
+            f"Fastest with recall >= {options['target_recall']}: "
+            f"embedding_index(..., m={m}, ef_construction={ef_construction}) and HNSW_EF_SEARCH = {ef_search} "
+            f"(recall {recall:.3f}, p50 {p50 * 1000:.2f}ms)"
+        )
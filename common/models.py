@@ -1,20 +1,26 @@
 from __future__ import annotations
 from abc import abstractmethod
+from functools import cache
 import json
 from typing import Any, Dict, List, Type, Optional
 
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.conf import settings
-from pgvector.django import VectorField, HnswIndex
+from pgvector.django import VectorField, HalfVectorField, HnswIndex
 from pydantic import BaseModel
 from openai import OpenAI
 
+from common.text import normalize_name
+
 
 class SchemaMixin:
     SCHEMA_FIELDS: List[str]
     
     @classmethod
-    def get_schema(cls) -> str:
+    @cache
+    def get_schema(cls, compact: bool = False) -> str:
+        """Schema of ``SCHEMA_FIELDS`` as JSON, built once per model class; ``compact`` drops the indentation."""
         schema = dict()
         for field in cls._meta.get_fields():
             if field.name in cls.SCHEMA_FIELDS:
@@ -28,11 +34,21 @@ class SchemaMixin:
                     "field_null": field.null,
                     "field_unique": field.unique,
                 }
+        if compact:
+            return json.dumps(schema, separators=(",", ":"))
         return json.dumps(schema, indent=4)
 
+    @classmethod
+    @cache
+    def get_system_prompt(cls, template: str, compact: bool = False) -> str:
+        """``template`` rendered with this model's schema, cached per model class."""
+        return template.format(model_schema=cls.get_schema(compact))
+
 
 class EmbeddedModelMixin(models.Model, SchemaMixin):
     ModelBaseModel: Type[BaseModel]
+    # hnsw.ef_search for similarity queries on this model, None keeps the server setting (40 by default).
+    HNSW_EF_SEARCH: Optional[int] = None
 
     @abstractmethod
     def get_embedding_key(self) -> str:
@@ -47,6 +63,16 @@ class EmbeddedModelMixin(models.Model, SchemaMixin):
     def create_from_base_model(cls, base_model: ModelBaseModel, default_values: Optional[Dict[str, Any]] = None):
         pass
 
+    @classmethod
+    def get_embedding_dimensions(cls) -> int:
+        """
+        Dimensions of the ``embedding`` field.
+
+        text-embedding-3 models can shorten their output, so a model narrows its embeddings by overriding the field
+        with fewer dimensions; the leading dimensions carry most of the meaning.
+        """
+        return cls._meta.get_field("embedding").dimensions
+
     def save(self, *args, update_embedding: bool = False, **kwargs):
         if update_embedding:
             self.embedding = self.get_embedding()
@@ -54,13 +80,19 @@ class EmbeddedModelMixin(models.Model, SchemaMixin):
 
     class Meta:
         abstract = True
-        indexes = [
-            HnswIndex(
-                name="embedding_index",
-                fields=["embedding"],
-                opclasses=["vector_cosine_ops"],
-            )
-        ]
+
+
+def embedding_index(
+    name: str, opclass: str = "halfvec_cosine_ops", m: Optional[int] = None, ef_construction: Optional[int] = None
+) -> HnswIndex:
+    """
+    HNSW index over ``embedding`` for cosine distance lookups.
+
+    Models declaring their own ``Meta`` do not inherit the indexes of abstract parents, so every concrete embedded
+    model lists one under a table-specific name. ``m`` and ``ef_construction`` fall back to pgvector's defaults
+    (16 and 64); larger values build a slower, bigger index with better recall (see the tune_hnsw command).
+    """
+    return HnswIndex(name=name, fields=["embedding"], opclasses=[opclass], m=m, ef_construction=ef_construction)
 
 
 class EmbeddedModelSmallMixin(EmbeddedModelMixin):
@@ -69,7 +101,13 @@ class EmbeddedModelSmallMixin(EmbeddedModelMixin):
     def get_embedding(self) -> List[float]:
         client = OpenAI(**settings.LLM_SETTINGS["default"])
         return (
-            client.embeddings.create(input=self.get_embedding_key(), model="text-embedding-3-small").data[0].embedding
+            client.embeddings.create(
+                input=self.get_embedding_key(),
+                model="text-embedding-3-small",
+                dimensions=self.get_embedding_dimensions(),
+            )
+            .data[0]
+            .embedding
         )
 
     class Meta:
@@ -77,13 +115,71 @@ class EmbeddedModelSmallMixin(EmbeddedModelMixin):
 
 
 class EmbeddedModelLargeMixin(EmbeddedModelMixin):
-    embedding = VectorField(dimensions=3072, null=True)
+    # pgvector's HNSW indexes at most 2000 dimensions of vector but 4000 of halfvec, which also halves the storage.
+    # benchmark_vector_index measures what the half precision costs in recall.
+    embedding = HalfVectorField(dimensions=3072, null=True)
 
     def get_embedding(self) -> List[float]:
         client = OpenAI(**settings.LLM_SETTINGS["default"])
         return (
-            client.embeddings.create(input=self.get_embedding_key(), model="text-embedding-3-large").data[0].embedding
+            client.embeddings.create(
+                input=self.get_embedding_key(),
+                model="text-embedding-3-large",
+                dimensions=self.get_embedding_dimensions(),
+            )
+            .data[0]
+            .embedding
+        )
+
+    class Meta:
+        abstract = True
+
+
+class NameIndexedMixin(models.Model):
+    """
+    Indexes ``name`` and known aliases by their normalized form so lookups by name can skip vector search.
+
+    Concrete models declare a GIN index on ``aliases`` for ``aliases__overlap`` lookups.
+    """
+
+    normalized_name = models.CharField(max_length=255, db_index=True, blank=True, default="")
+    aliases = ArrayField(models.CharField(max_length=255), default=list, blank=True)
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "normalized_name"}
+        return super().save(*args, **kwargs)
+
+    @classmethod
+    def find_by_names(cls, names: List[str], queryset: Optional[models.QuerySet] = None) -> Dict[str, List[Any]]:
+        """Instances whose normalized name or one of whose aliases equals each normalized name, in one query."""
+        normalized_names = {normalize_name(name) for name in names}
+        matches = {name: [] for name in normalized_names}
+        queryset = cls.objects.all() if queryset is None else queryset
+        for obj in queryset.filter(
+            models.Q(normalized_name__in=normalized_names) | models.Q(aliases__overlap=list(normalized_names))
+        ).order_by():
+            for name in {obj.normalized_name, *obj.aliases} & normalized_names:
+                matches[name].append(obj)
+        return matches
+
+    def add_alias(self, name: str) -> bool:
+        """Record ``name`` as an alias unless it already resolves to this instance."""
+        alias = normalize_name(name)
+        if not alias or alias == self.normalized_name or alias in self.aliases:
+            return False
+        self.aliases.append(alias)
+        type(self).objects.filter(pk=self.pk).exclude(aliases__contains=[alias]).update(
+            aliases=models.Func(
+                models.F("aliases"),
+                models.Value(alias),
+                function="array_append",
+                output_field=ArrayField(models.CharField(max_length=255)),
+            )
         )
+        return True
 
     class Meta:
         abstract = True
@@ -1,3 +1,6 @@
+from typing import Dict, NamedTuple, Optional
+
+
 EMBEDDING_SERVICE_SYSTEM_PROMPT_V1 = """
 # Role
 You are a data matching and creation assistant for a Django application.
@@ -73,4 +76,80 @@ AI_GENERATABLE_SERVICE_USER_PROMPT_V1 = """
 - No null bytes (\x00) in any string
 - No control characters in strings
 - Clean, valid UTF-8 only
-"""
\ No newline at end of file
+"""
+
+
+# Providers only reuse a cached prompt prefix when it matches byte for byte, so system prompts keep everything that does
+# not depend on the model class first and the schema last. V2 moves the guidelines of V1 above the schema.
+AI_GENERATABLE_SERVICE_SYSTEM_PROMPT_V2 = """
+# Role
+You are a Django model generator that creates database-ready objects from raw data.
+
+# Instructions
+You will receive raw data and a model schema.
+Generate a complete model instance that matches the schema exactly.
+
+# Critical Requirements
+- ALL text content must be in English, regardless of input language
+- Translate any non-English input to English in your output
+- For optional fields: use null/None if data is genuinely missing
+- For required text fields: never use null, use empty string "" if blank
+- NEVER include null bytes (\x00, \0, NUL) in any string values
+- NEVER include control characters (ASCII 0-31) except standard whitespace (space, newline, tab)
+- All strings must be valid, clean UTF-8 text
+- Remove any special characters that could break database storage
+
+# Guidelines
+- Optional[str] fields: can be null or valid string (no null bytes)
+- Required str fields: must be non-null string (use "" if empty)
+- Translate all non-English text to English
+- Clean any malformed or dangerous characters from strings
+
+# Context
+<model_schema>
+{model_schema}
+</model_schema>
+"""
+
+
+class Prompt(NamedTuple):
+    name: str
+    version: int
+    system: str
+    user: str
+
+
+EMBEDDING_SERVICE_PROMPT = "embedding_service"
+AI_GENERATABLE_SERVICE_PROMPT = "ai_generatable_service"
+
+PROMPTS: Dict[str, Dict[int, Prompt]] = {
+    EMBEDDING_SERVICE_PROMPT: {
+        1: Prompt(EMBEDDING_SERVICE_PROMPT, 1, EMBEDDING_SERVICE_SYSTEM_PROMPT_V1, EMBEDDING_SERVICE_USER_PROMPT_V1),
+    },
+    AI_GENERATABLE_SERVICE_PROMPT: {
+        1: Prompt(
+            AI_GENERATABLE_SERVICE_PROMPT,
+            1,
+            AI_GENERATABLE_SERVICE_SYSTEM_PROMPT_V1,
+            AI_GENERATABLE_SERVICE_USER_PROMPT_V1,
+        ),
+        2: Prompt(
+            AI_GENERATABLE_SERVICE_PROMPT,
+            2,
+            AI_GENERATABLE_SERVICE_SYSTEM_PROMPT_V2,
+            AI_GENERATABLE_SERVICE_USER_PROMPT_V1,
+        ),
+    },
+}
+
+
+def get_prompt(name: str, version: Optional[int] = None) -> Prompt:
+    """Return a registered prompt, the latest version unless ``version`` is given."""
+    versions = PROMPTS.get(name)
+    if not versions:
+        raise ValueError(f"Unknown prompt {name}")
+    if version is None:
+        version = max(versions)
+    if version not in versions:
+        raise ValueError(f"Unknown version {version} for prompt {name}")
+    return versions[version]
@@ -0,0 +1,45 @@
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``per_minute`` tokens per minute.
+
+    ``reserve`` takes the tokens right away, letting the bucket go into debt, and returns how long the caller
+    has to wait before using them. That lets both threads (``time.sleep``) and coroutines (``asyncio.sleep``)
+    share one bucket.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self, amount: float = 1):
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+
+_token_buckets: Dict[str, TokenBucket] = dict()
+_token_buckets_lock = threading.Lock()
+
+
+def get_token_bucket(name: str, per_minute: float, capacity: Optional[float] = None) -> TokenBucket:
+    """Return the process-wide token bucket registered under ``name``, creating it on first use."""
+    with _token_buckets_lock:
+        if name not in _token_buckets:
+            _token_buckets[name] = TokenBucket(per_minute, capacity)
+        return _token_buckets[name]
@@ -1,29 +1,34 @@
 from random import shuffle
-from typing import Type, List, TypeVar, Generic, Union, Optional, Dict, Any, Set, Tuple
+import asyncio
+from typing import Type, List, TypeVar, Generic, Union, Optional, Dict, Any, Set, Tuple, NamedTuple
 import json
 import logging
 import hashlib
 from abc import ABC, abstractmethod
+import random
 import re
+import time
+from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
 
-from langfuse import get_client, propagate_attributes
+import httpx
+import openai
+from django.apps import apps
 from django.core.cache import caches
-from pgvector.django import CosineDistance
+from django.db import connection, models, transaction
 from django.conf import settings
-from django.forms.models import model_to_dict
-from pydantic import BaseModel, Field, ConfigDict
+from openai import OpenAI
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.messages import SystemMessage, HumanMessage
+from langchain.messages import SystemMessage, HumanMessage, AIMessage
 from langfuse.langchain import CallbackHandler
 
-from common.prompts import (
-    EMBEDDING_SERVICE_SYSTEM_PROMPT_V1,
-    EMBEDDING_SERVICE_USER_PROMPT_V1,
-    AI_GENERATABLE_SERVICE_SYSTEM_PROMPT_V1,
-    AI_GENERATABLE_SERVICE_USER_PROMPT_V1,
-)
-from common.models import EmbeddedModelSmallMixin, EmbeddedModelLargeMixin, AIGeneratableMixin
+from common.prompts import EMBEDDING_SERVICE_PROMPT, AI_GENERATABLE_SERVICE_PROMPT, get_prompt
+from common.cache import get_local_cache
+from common.ratelimit import get_token_bucket
+from common.tracing import get_trace_exporter
+from common.models import EmbeddedModelSmallMixin, EmbeddedModelLargeMixin, AIGeneratableMixin, NameIndexedMixin
+from common.text import normalize_name
 
 
 logger = logging.getLogger(__name__)
@@ -40,7 +45,27 @@ class EvaluatableAgent(ABC):
         pass
 
     def _get_metadata(self, resp: Dict[str, Any]) -> Dict[str, Any]:
-        return vars(resp["raw"])
+        if resp["raw"] is None:
+            return {"error": str(resp.get("error"))}
+        usage = resp["raw"].usage_metadata or {}
+        return {
+            **vars(resp["raw"]),
+            "input_tokens": usage.get("input_tokens", 0),
+            "cached_tokens": (usage.get("input_token_details") or {}).get("cache_read") or 0,
+        }
+
+    def _get_prompt_cache_key(self) -> str:
+        """Requests of an agent for one model class and prompt version share their prompt prefix."""
+        return f"{self.agent_name}:{self.model.__name__}:v{self.prompt.version}"
+
+    def _log_token_usage(self, metadata: List[Dict[str, Any]]):
+        input_tokens = sum(item.get("input_tokens", 0) for item in metadata)
+        cached_tokens = sum(item.get("cached_tokens", 0) for item in metadata)
+        if input_tokens:
+            logger.info(
+                f"{self.agent_name}: {cached_tokens}/{input_tokens} input tokens served from the provider prompt cache "
+                f"({cached_tokens / input_tokens:.0%})"
+            )
 
     def _validate_inputs_sizes(
         self,
@@ -111,16 +136,16 @@ class EvaluatableAgent(ABC):
         metadata: Optional[Dict[str, Any]] = None,
         tags: Optional[List[str]] = None,
     ):
-        langfuse = get_client()
-
-        with propagate_attributes(tags=tags or []):
-            langfuse.start_observation(
-                name=self.agent_name,
-                input=inputs,
-                output=output,
-                model=self.llm_model,
-                metadata=metadata,
-            ).end()
+        get_trace_exporter().submit(
+            {
+                "name": self.agent_name,
+                "input": inputs,
+                "output": output,
+                "model": self.llm_model,
+                "metadata": metadata,
+                "tags": tags,
+            }
+        )
 
     def execute(self, *args, tags: Optional[List[str] | List[List[str]]] = None, **kwargs) -> Any:
         output, metadata = self._execute(*args, **kwargs)
@@ -141,17 +166,42 @@ class EvaluatableAgent(ABC):
                 inputs.update({name: value[i] for name, value in zip(self.input_names, args)})
                 self._log_trace(inputs, result, metadata[i] if metadata else None, tags[i] if tags else None)
 
-        langfuse = get_client()
-        langfuse.flush()
+        self._log_token_usage(metadata if isinstance(metadata, list) else [metadata or {}])
 
         return output
 
 
+class ModelReference(NamedTuple):
+    """What CacheService stores for a model instance when it only caches primary keys."""
+
+    label: str
+    pk: Any
+
+
 class CacheService:
-    def __init__(self, prefix: str, cache_name: str = "default", cache_ttl: int = 30 * 24 * 60 * 60):
+    def __init__(
+        self,
+        prefix: str,
+        cache_name: str = "default",
+        cache_ttl: int = 30 * 24 * 60 * 60,
+        local_cache_size: int = 0,
+        local_cache_ttl: Optional[int] = 60 * 60,
+        store_pks: bool = False,
+        deferred_fields: Optional[List[str]] = None,
+    ):
+        """
+        With ``store_pks`` enabled, model instances are cached in Redis as ``ModelReference`` pairs and rehydrated
+        with one ``in_bulk()`` query per model on read, skipping ``deferred_fields`` (e.g. embedding, raw_data). The
+        local cache keeps the hydrated instances, so its hits do not query the database.
+        """
         self.prefix = prefix
         self.cache_ttl = cache_ttl
         self.cache = caches[cache_name]
+        self.store_pks = store_pks
+        self.deferred_fields = deferred_fields or []
+        self.local_cache = (
+            get_local_cache(f"{cache_name}:{prefix}", local_cache_size, local_cache_ttl) if local_cache_size else None
+        )
 
     @staticmethod
     def sanitize_key(key: str, max_length: int = 200) -> str:
@@ -172,40 +222,359 @@ class CacheService:
 
         return sanitized
 
+    def make_key(self, key: str) -> str:
+        return f"{self.prefix}:{self.sanitize_key(key)}"
+
+    def get_cached_items(self, keys: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Look up all keys in a single round trip.
+
+        Returns a mapping of the cached keys to their values, and the list of uncached keys in input order
+        (without duplicates).
+        """
+        return self._lookup(keys)
+
+    def _lookup(self, keys: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        unique_keys = list(dict.fromkeys(keys))
+        cache_keys = {key: self.make_key(key) for key in unique_keys}
+        values = self._get_many(list(cache_keys.values()))
+
+        hits = dict()
+        misses = []
+        for key, cache_key in cache_keys.items():
+            if cache_key in values:
+                hits[key] = values[cache_key]
+            else:
+                misses.append(key)
+        return hits, misses
+
     def get_cached_keys(self, keys: List[str]) -> List[str]:
-        return list({key for key in keys if self.cache.get(f"{self.prefix}:{self.sanitize_key(key)}") is not None})
+        hits, _ = self._lookup(keys)
+        return list(hits)
 
     def get_uncached_keys(self, keys: List[str]) -> Set[str]:
-        return {key for key in keys if key not in self.get_cached_keys(keys)}
+        _, misses = self._lookup(keys)
+        return set(misses)
+
+    def _to_reference(self, value: Any) -> Any:
+        if isinstance(value, models.Model) and value.pk is not None:
+            return ModelReference(value._meta.label_lower, value.pk)
+        return value
+
+    def _load_references(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace cached references with model instances, dropping the ones whose rows no longer exist."""
+        pks_by_label = defaultdict(set)
+        for value in values.values():
+            if isinstance(value, ModelReference):
+                pks_by_label[value.label].add(value.pk)
+
+        instances = dict()
+        for label, pks in pks_by_label.items():
+            model = apps.get_model(label)
+            field_names = {field.name for field in model._meta.concrete_fields}
+            deferred_fields = [name for name in self.deferred_fields if name in field_names]
+            for pk, instance in model.objects.defer(*deferred_fields).in_bulk(pks).items():
+                instances[(label, pk)] = instance
+
+        res = dict()
+        for key, value in values.items():
+            if not isinstance(value, ModelReference):
+                res[key] = value
+            elif (value.label, value.pk) in instances:
+                res[key] = instances[(value.label, value.pk)]
+        return res
+
+    def _get_remote_many(self, cache_keys: List[str]) -> Dict[str, Any]:
+        values = self.cache.get_many(cache_keys)
+        if self.store_pks:
+            values = self._load_references(values)
+        return values
+
+    def _get_many(self, cache_keys: List[str]) -> Dict[str, Any]:
+        if self.local_cache is None:
+            return self._get_remote_many(cache_keys)
+
+        values = self.local_cache.get_many(cache_keys)
+        remote_keys = [cache_key for cache_key in cache_keys if cache_key not in values]
+        if remote_keys:
+            remote_values = self._get_remote_many(remote_keys)
+            self.local_cache.set_many(remote_values)
+            values.update(remote_values)
+        return values
 
     def set_cache_values(self, keys: List[str], values: List[Any]):
-        for key, value in zip(keys, values):
-            self.cache.set(f"{self.prefix}:{self.sanitize_key(key)}", value, self.cache_ttl)
+        data = {self.make_key(key): value for key, value in zip(keys, values)}
+        remote_data = {key: self._to_reference(value) for key, value in data.items()} if self.store_pks else data
+        self.cache.set_many(remote_data, self.cache_ttl)
+        if self.local_cache is not None:
+            self.local_cache.set_many(data)
 
     def get_cached_values(self, keys: List[str]) -> List[Any]:
-        return [self.cache.get(f"{self.prefix}:{self.sanitize_key(key)}") for key in keys]
+        hits, _ = self.get_cached_items(keys)
+        return [hits.get(key) for key in keys]
 
 
 class BulkLLMCaller:
-    def __init__(self, base_model: Type[BaseModel], llm_model: str = "gpt-5-mini"):
-        self.client = ChatOpenAI(
-            **settings.LLM_SETTINGS["default"], model=llm_model, reasoning={"effort": "medium", "summary": "auto"}
-        ).with_structured_output(base_model, include_raw=True)
+    """
+    Runs many structured LLM calls concurrently.
+
+    At most ``max_concurrency`` calls are in flight, optionally throttled by token buckets on requests and
+    (estimated input) tokens per minute. The buckets are kept per process and model, so every caller of a model in
+    a worker process draws from the same quota. Transient provider errors are retried per task with exponential backoff
+    and jitter. A task that still fails does not fail the batch: ``call`` returns its slot as a response with
+    ``parsed`` set to None and the exception under ``error``.
+
+    The ``thread`` engine runs each call on a worker thread; the ``async`` engine runs all of them as coroutines
+    on one event loop behind the same synchronous ``call``, so waiting on the provider costs no OS threads.
+    """
+
+    THREAD_ENGINE = "thread"
+    ASYNC_ENGINE = "async"
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )
+
+    def __init__(
+        self,
+        base_model: Type[BaseModel],
+        llm_model: str = "gpt-5-mini",
+        max_concurrency: int = 16,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 3,
+        backoff_factor: float = 2.0,
+        backoff_jitter: float = 1.0,
+        engine: Optional[str] = None,
+        prompt_cache_key: Optional[str] = None,
+    ):
+        self.base_model = base_model
+        self.llm_model = llm_model
+        self.engine = engine or settings.BULK_LLM_ENGINE
+        self.prompt_cache_key = prompt_cache_key
+        self.max_concurrency = max_concurrency
+        self.requests_bucket = (
+            get_token_bucket(f"{llm_model}:requests", requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens_bucket = get_token_bucket(f"{llm_model}:tokens", tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.client = self._build_client()
         self.data = []
         self.tags = []
 
+    def _build_client(self, **kwargs):
+        if self.prompt_cache_key:
+            # Routes requests sharing a prompt prefix to the same provider cache.
+            kwargs["model_kwargs"] = {"prompt_cache_key": self.prompt_cache_key}
+        # _call/_acall own the retry policy, so the openai client must not retry underneath them.
+        return ChatOpenAI(
+            **settings.LLM_SETTINGS["default"],
+            model=self.llm_model,
+            reasoning={"effort": "medium", "summary": "auto"},
+            max_retries=0,
+            **kwargs,
+        ).with_structured_output(self.base_model, include_raw=True)
+
     def add_task(self, inputs: List, tags: Optional[List[str]] = None):
         self.data.append(inputs)
         self.tags.append(tags)
 
+    @staticmethod
+    def _estimate_tokens(inputs: List) -> int:
+        return sum(len(str(getattr(message, "content", message))) for message in inputs) // 4 + 1
+
+    def _get_throttle_delay(self, inputs: List) -> float:
+        delay = 0.0
+        if self.requests_bucket is not None:
+            delay = max(delay, self.requests_bucket.reserve())
+        if self.tokens_bucket is not None:
+            delay = max(delay, self.tokens_bucket.reserve(self._estimate_tokens(inputs)))
+        return delay
+
+    def _get_backoff(self, attempt: int) -> float:
+        return self.backoff_factor * (2**attempt) + random.uniform(0, self.backoff_jitter)
+
     def _call(self, inputs: List, tags: Optional[List[str]] = None):
-        langfuse_handler = CallbackHandler()
-        return self.client.invoke(inputs, config={"callbacks": [langfuse_handler], "tags": tags})
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._get_throttle_delay(inputs))
+            try:
+                langfuse_handler = CallbackHandler()
+                return self.client.invoke(inputs, config={"callbacks": [langfuse_handler], "tags": tags})
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                backoff = self._get_backoff(attempt)
+                logger.warning(f"LLM call failed ({e}), retrying in {backoff:.1f}s")
+                time.sleep(backoff)
+
+    async def _acall(self, client, semaphore: asyncio.Semaphore, inputs: List, tags: Optional[List[str]] = None):
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._get_throttle_delay(inputs))
+            try:
+                async with semaphore:
+                    langfuse_handler = CallbackHandler()
+                    return await client.ainvoke(inputs, config={"callbacks": [langfuse_handler], "tags": tags})
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                backoff = self._get_backoff(attempt)
+                logger.warning(f"LLM call failed ({e}), retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+
+    async def _acall_all(self) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        # The HTTP client is bound to this event loop, so it is created and closed with it.
+        async with httpx.AsyncClient(limits=limits) as http_client:
+            client = self._build_client(http_async_client=http_client)
+            return await asyncio.gather(
+                *[self._acall(client, semaphore, inputs, tags) for inputs, tags in zip(self.data, self.tags)],
+                return_exceptions=True,
+            )
 
-    def call(self):
-        with ThreadPoolExecutor() as executor:
+    def _call_all_in_threads(self) -> List[Any]:
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
             futures = [executor.submit(self._call, inputs, tags) for inputs, tags in zip(self.data, self.tags)]
-            resps = [future.result() for future in futures]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def call(self) -> List[Dict[str, Any]]:
+        if self.engine == self.ASYNC_ENGINE:
+            results = asyncio.run(self._acall_all())
+        else:
+            results = self._call_all_in_threads()
+
+        resps = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"LLM call failed: {result}")
+                result = {"raw": None, "parsed": None, "parsing_error": None, "error": result}
+            resps.append(result)
+        self.data.clear()
+        self.tags.clear()
+        return resps
+
+
+class BatchLLMCaller:
+    """
+    Offline counterpart of BulkLLMCaller for non-urgent work, built on an OpenAI-compatible batch endpoint.
+
+    ``call`` writes the queued tasks to a JSONL batch file, submits it, polls until the batch finishes and maps the
+    results back to the tasks by custom ID. Responses have the same shape as BulkLLMCaller's, including ``error``
+    for tasks the batch did not answer.
+    """
+
+    MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+    FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(
+        self,
+        base_model: Type[BaseModel],
+        llm_model: str = "gpt-5-mini",
+        poll_interval: float = 60,
+        timeout: float = 24 * 60 * 60,
+        completion_window: str = "24h",
+        prompt_cache_key: Optional[str] = None,
+    ):
+        self.base_model = base_model
+        self.llm_model = llm_model
+        self.prompt_cache_key = prompt_cache_key
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.completion_window = completion_window
+        self.client = OpenAI(**settings.LLM_SETTINGS["default"])
+        self.data = []
+        self.tags = []
+
+    def add_task(self, inputs: List, tags: Optional[List[str]] = None):
+        self.data.append(inputs)
+        self.tags.append(tags)
+
+    def _build_request(self, custom_id: str, inputs: List) -> Dict[str, Any]:
+        schema = openai.pydantic_function_tool(self.base_model)["function"]
+        body = {
+            "model": self.llm_model,
+            "reasoning_effort": "medium",
+            "messages": [{"role": self.MESSAGE_ROLES[message.type], "content": message.content} for message in inputs],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": schema["name"], "schema": schema["parameters"], "strict": True},
+            },
+        }
+        if self.prompt_cache_key:
+            body["prompt_cache_key"] = self.prompt_cache_key
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def _submit(self) -> str:
+        lines = [json.dumps(self._build_request(f"task-{i}", inputs)) for i, inputs in enumerate(self.data)]
+        batch_file = self.client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window=self.completion_window
+        )
+        logger.info(f"Submitted LLM batch {batch.id} with {len(lines)} requests")
+        return batch.id
+
+    def _wait(self, batch_id: str):
+        deadline = time.monotonic() + self.timeout
+        batch = self.client.batches.retrieve(batch_id)
+        while batch.status not in self.FINAL_STATUSES:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"LLM batch {batch_id} did not finish in {self.timeout}s (status: {batch.status})")
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch_id)
+        logger.info(f"LLM batch {batch_id} finished with status {batch.status}")
+        return batch
+
+    def _parse_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if result.get("error") or result["response"]["status_code"] != 200:
+            error = result.get("error") or result["response"]["body"]
+            return {"raw": None, "parsed": None, "parsing_error": None, "error": RuntimeError(str(error))}
+
+        body = result["response"]["body"]
+        content = body["choices"][0]["message"]["content"]
+        usage = body.get("usage") or {}
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        raw = AIMessage(
+            content=content,
+            id=body.get("id"),
+            response_metadata=body,
+            usage_metadata={
+                "input_tokens": usage.get("prompt_tokens", 0),
+                "output_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", 0),
+                "input_token_details": {"cache_read": cached_tokens},
+            },
+        )
+        try:
+            return {"raw": raw, "parsed": self.base_model.model_validate_json(content), "parsing_error": None}
+        except ValidationError as e:
+            return {"raw": raw, "parsed": None, "parsing_error": e}
+
+    def call(self) -> List[Dict[str, Any]]:
+        if not self.data:
+            return []
+
+        batch = self._wait(self._submit())
+        results = dict()
+        for file_id in [batch.output_file_id, batch.error_file_id]:
+            if file_id is None:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    result = json.loads(line)
+                    results[result["custom_id"]] = self._parse_result(result)
+
+        missing = {"raw": None, "parsed": None, "parsing_error": None, "error": RuntimeError(f"No result in batch {batch.id}")}
+        resps = [results.get(f"task-{i}", missing) for i in range(len(self.data))]
         self.data.clear()
         self.tags.clear()
         return resps
@@ -225,10 +594,17 @@ class ModelFinderAgent(EvaluatableAgent):
     agent_name = "model_finder_agent"
     input_names = ["keys", "similar_items"]
 
-    def __init__(self, model: Type[EmbeddingModelType], llm_model: str = "gpt-5-mini"):
+    def __init__(
+        self,
+        model: Type[EmbeddingModelType],
+        llm_model: str = "gpt-5-mini",
+        compact_schema: bool = False,
+        prompt_version: Optional[int] = None,
+    ):
         self.model = model
         self.llm_model = llm_model
-        self.client = ChatOpenAI(**settings.LLM_SETTINGS["default"], model=llm_model, reasoning={"effort": "medium", "summary": "auto"})
+        self.compact_schema = compact_schema
+        self.prompt = get_prompt(EMBEDDING_SERVICE_PROMPT, prompt_version)
 
     def _execute(
         self,
@@ -243,26 +619,32 @@ class ModelFinderAgent(EvaluatableAgent):
         if tags is None:
             tags = [None] * len(keys)
 
-        res = []
-        metadata = []
-        structured_client = self.client.with_structured_output(Result, include_raw=True)
+        system_prompt = self.model.get_system_prompt(self.prompt.system, self.compact_schema)
+        bulk_llm_caller = BulkLLMCaller(
+            Result,
+            self.llm_model,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            prompt_cache_key=self._get_prompt_cache_key(),
+        )
         for key, tag, similars in zip(keys, tags, similar_items):
-            langfuse_handler = CallbackHandler()
-            resp = structured_client.invoke(
+            bulk_llm_caller.add_task(
                 [
-                    SystemMessage(
-                        content=EMBEDDING_SERVICE_SYSTEM_PROMPT_V1.format(
-                            model_schema=json.dumps(self.model.get_schema(), indent=4)
-                        )
-                    ),
+                    SystemMessage(content=system_prompt),
                     HumanMessage(
-                        content=EMBEDDING_SERVICE_USER_PROMPT_V1.format(
+                        content=self.prompt.user.format(
                             key=key, similar_items="\n===========\n".join(similars)
                         )
                     ),
                 ],
-                config={"callbacks": [langfuse_handler], "tags": tag or ["embedding-service", self.model.__name__]},
+                tag or ["embedding-service", self.model.__name__],
             )
+
+        resps = bulk_llm_caller.call()
+
+        res = []
+        metadata = []
+        for resp in resps:
             res.append(resp["parsed"])
             metadata.append(self._get_metadata(resp))
         return res, metadata
@@ -274,51 +656,142 @@ class EmbeddingService(Generic[EmbeddingModelType]):
         model: Type[EmbeddingModelType],
         llm_model: str = "gpt-5-mini",
         embedding_model: str = "text-embedding-3-large",
+        compact_schema: bool = False,
+        ef_search: Optional[int] = None,
     ):
+        """``ef_search`` overrides the model's ``HNSW_EF_SEARCH`` for similarity queries."""
         self.model = model
         self.llm_model = llm_model
         self.embedding_model = embedding_model
-        self.agent = ModelFinderAgent(model, llm_model)
-
-    def _convert_model_instance_to_str(self, instance: EmbeddingModelType) -> str:
-        data = model_to_dict(instance)
-        data.pop("embedding")
-        return json.dumps(data, indent=4)
-
-    def get_similar_items(self, embedding: List[float], k: int = 10, threshold: float = 2.0) -> List[str]:
-        res = [
-            self._convert_model_instance_to_str(obj)
-            for obj in self.model.objects.annotate(distance=CosineDistance("embedding", embedding))
-            .order_by("distance")
-            .filter(distance__lte=threshold)[:k]
+        self.ef_search = ef_search or model.HNSW_EF_SEARCH
+        self.agent = ModelFinderAgent(model, llm_model, compact_schema)
+
+    def _get_similar_items_sql(self) -> Tuple[str, List[str]]:
+        """kNN over every probe vector in one statement, selecting the ``SCHEMA_FIELDS`` columns and the ID only."""
+        quote_name = connection.ops.quote_name
+        fields = [self.model._meta.pk] + [
+            self.model._meta.get_field(name) for name in self.model.SCHEMA_FIELDS if name != self.model._meta.pk.name
         ]
-        shuffle(res)
+        embedding_type = self.model._meta.get_field("embedding").db_type(connection)
+        columns = ", ".join(f"item.{quote_name(field.column)}" for field in fields)
+        sql = f"""
+            SELECT probe.ord, nearest.distance, {", ".join(f"nearest.{quote_name(field.column)}" for field in fields)}
+            FROM unnest(%s::{embedding_type}[]) WITH ORDINALITY AS probe(embedding, ord)
+            CROSS JOIN LATERAL (
+                SELECT {columns}, item.{quote_name("embedding")} <=> probe.embedding AS distance
+                FROM {quote_name(self.model._meta.db_table)} AS item
+                WHERE item.{quote_name("embedding")} IS NOT NULL
+                ORDER BY item.{quote_name("embedding")} <=> probe.embedding
+                LIMIT %s
+            ) AS nearest
+            WHERE nearest.distance <= %s
+            ORDER BY probe.ord, nearest.distance
+        """
+        return sql, [field.attname for field in fields]
+
+    def get_similar_items_bulk(
+        self, embeddings: List[List[float]], k: int = 10, threshold: float = 2.0, ef_search: Optional[int] = None
+    ) -> List[List[str]]:
+        """Up to ``k`` items within ``threshold`` cosine distance of each embedding, serialized for the prompt."""
+        if not embeddings:
+            return []
+
+        sql, names = self._get_similar_items_sql()
+        vectors = ["[" + ",".join(map(str, embedding)) + "]" for embedding in embeddings]
+        ef_search = ef_search or self.ef_search
+        res = [[] for _ in embeddings]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if ef_search:
+                # The HNSW scan returns at most ef_search rows, so it never goes below k. is_local makes this a
+                # SET LOCAL that ends with the transaction instead of leaking into the pooled connection.
+                cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", [str(max(ef_search, k))])
+            cursor.execute(sql, [vectors, k, threshold])
+            for position, _, *values in cursor.fetchall():
+                res[position - 1].append(json.dumps(dict(zip(names, values)), ensure_ascii=False, default=str))
+        for items in res:
+            shuffle(items)
+        return res
+
+    def get_similar_items(
+        self, embedding: List[float], k: int = 10, threshold: float = 2.0, ef_search: Optional[int] = None
+    ) -> List[str]:
+        return self.get_similar_items_bulk([embedding], k, threshold, ef_search)[0]
+
+    def _match_names(self, keys: List[str]) -> Dict[str, EmbeddingModelType]:
+        """Keys whose normalized form is the name or an alias of exactly one instance; ambiguous keys are left out."""
+        if not issubclass(self.model, NameIndexedMixin):
+            return dict()
+
+        matches = self.model.find_by_names(keys, self.model.objects.defer("embedding"))
+        res = dict()
+        for key in keys:
+            objs = matches[normalize_name(key)]
+            if len(objs) == 1:
+                res[key] = objs[0]
         return res
 
+    def _record_aliases(self, keys: List[str], items: List[Optional[EmbeddingModelType]]):
+        if not issubclass(self.model, NameIndexedMixin):
+            return
+
+        for key, item in zip(keys, items):
+            if item is None:
+                continue
+            try:
+                item.add_alias(key)
+            except Exception as e:
+                logger.error(f"Failed to record alias {key} for {self.model.__name__} {item.pk}: {e}")
+
     def _get_or_create_items(
         self,
         keys: List[str],
         k: int = 10,
         threshold: float = 2.0,
         tags: Optional[List[List[str]]] = None,
+    ) -> List[EmbeddingModelType]:
+        if tags is None:
+            tags = [None] * len(keys)
+
+        matched = self._match_names(keys)
+        unknown = [(key, tag) for key, tag in zip(keys, tags) if key not in matched]
+        if matched:
+            logger.info(f"Matched {len(matched)}/{len(keys)} {self.model.__name__} keys by name")
+        if unknown:
+            unknown_keys = [key for key, _ in unknown]
+            resolved = self._resolve_items(unknown_keys, k, threshold, [tag for _, tag in unknown])
+            self._record_aliases(unknown_keys, resolved)
+            matched.update(zip(unknown_keys, resolved))
+        return [matched[key] for key in keys]
+
+    def _resolve_items(
+        self,
+        keys: List[str],
+        k: int = 10,
+        threshold: float = 2.0,
+        tags: Optional[List[List[str]]] = None,
     ) -> List[EmbeddingModelType]:
         embeddings_client = OpenAIEmbeddings(
             model=self.embedding_model,
             openai_api_key=settings.LLM_SETTINGS["default"]["api_key"],
             openai_api_base=settings.LLM_SETTINGS["default"]["base_url"],
+            dimensions=self.model.get_embedding_dimensions(),
         )
         embeddings = embeddings_client.embed_documents(keys)
-        similar_items = []
-        for embedding in embeddings:
-            similar_items.append(self.get_similar_items(embedding, k, threshold))
+        similar_items = self.get_similar_items_bulk(embeddings, k, threshold)
         resps = self.agent.execute(keys, similar_items, tags=tags)
 
         res = []
-        for resp in resps:
-            if isinstance(resp.result, ObjectSelection):
-                model_obj = self.model.objects.get(id=resp.result.object_id)
-            else:
-                model_obj = self.model.create_from_base_model(resp.result)
+        for key, resp in zip(keys, resps):
+            model_obj = None
+            try:
+                if resp is None:
+                    logger.error(f"Failed to resolve {self.model.__name__} for {key}")
+                elif isinstance(resp.result, ObjectSelection):
+                    model_obj = self.model.objects.get(id=resp.result.object_id)
+                else:
+                    model_obj = self.model.create_from_base_model(resp.result)
+            except Exception as e:
+                logger.error(f"Failed to get or create {self.model.__name__} for {key}: {e}")
             res.append(model_obj)
         return res
 
@@ -333,13 +806,26 @@ class EmbeddingService(Generic[EmbeddingModelType]):
         if tags is None:
             tags = [None] * len(keys)
 
-        key_tags_map = {key: tag for key, tag in zip(keys, tags)}
-        uncached_keys = list(cache_service.get_uncached_keys(keys))
+        # Keys are resolved and cached once per normalized form; the first spelling and its tags stand for the rest.
+        normalized_keys = [normalize_name(key) for key in keys]
+        representatives = dict()
+        for key, normalized_key, tag in zip(keys, normalized_keys, tags):
+            representatives.setdefault(normalized_key, (key, tag))
+
+        items, uncached_keys = cache_service.get_cached_items(list(representatives))
         if uncached_keys:
-            tags = [key_tags_map[key] for key in uncached_keys]
-            new_items = self._get_or_create_items(uncached_keys, k, threshold, tags)
-            cache_service.set_cache_values(uncached_keys, new_items)
-        return cache_service.get_cached_values(keys)
+            logger.info(f"Resolving {len(uncached_keys)} {self.model.__name__} keys out of {len(keys)} requested")
+            new_items = self._get_or_create_items(
+                [representatives[key][0] for key in uncached_keys],
+                k,
+                threshold,
+                [representatives[key][1] for key in uncached_keys],
+            )
+            # Failed keys are left uncached so the next call retries them.
+            new_items = {key: item for key, item in zip(uncached_keys, new_items) if item is not None}
+            cache_service.set_cache_values(list(new_items), list(new_items.values()))
+            items.update(new_items)
+        return [items.get(key) for key in normalized_keys]
 
 
 AIGeneratableModelType = TypeVar("AIGeneratableModelType", bound=AIGeneratableMixin)
@@ -349,9 +835,19 @@ class ModelGenratorAgent(EvaluatableAgent):
     agent_name = "model_generator_agent"
     input_names = ["raw_data"]
 
-    def __init__(self, model: Type[AIGeneratableModelType], llm_model: str = "gpt-5-mini"):
+    def __init__(
+        self,
+        model: Type[AIGeneratableModelType],
+        llm_model: str = "gpt-5-mini",
+        batch_mode: bool = False,
+        compact_schema: bool = False,
+        prompt_version: Optional[int] = None,
+    ):
         self.model = model
         self.llm_model = llm_model
+        self.batch_mode = batch_mode
+        self.compact_schema = compact_schema
+        self.prompt = get_prompt(AI_GENERATABLE_SERVICE_PROMPT, prompt_version)
 
     def _execute(
         self,
@@ -369,17 +865,23 @@ class ModelGenratorAgent(EvaluatableAgent):
         if tags is None:
             tags = [None] * len(raw_data)
 
-        bulk_llm_caller = BulkLLMCaller(Result, self.llm_model)
+        system_prompt = self.model.get_system_prompt(self.prompt.system, self.compact_schema)
+        if self.batch_mode:
+            bulk_llm_caller = BatchLLMCaller(Result, self.llm_model, prompt_cache_key=self._get_prompt_cache_key())
+        else:
+            bulk_llm_caller = BulkLLMCaller(
+                Result,
+                self.llm_model,
+                requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+                prompt_cache_key=self._get_prompt_cache_key(),
+            )
         for data, tag in zip(raw_data, tags):
             bulk_llm_caller.add_task(
                 [
-                    SystemMessage(
-                        content=AI_GENERATABLE_SERVICE_SYSTEM_PROMPT_V1.format(
-                            model_schema=json.dumps(self.model.get_schema(), indent=4)
-                        )
-                    ),
+                    SystemMessage(content=system_prompt),
                     HumanMessage(
-                        content=AI_GENERATABLE_SERVICE_USER_PROMPT_V1.format(raw_data=json.dumps(data, indent=4))
+                        content=self.prompt.user.format(raw_data=json.dumps(data, indent=4))
                     ),
                 ],
                 tag or ["ai-generatable-service", self.model.__name__],
@@ -396,10 +898,20 @@ class ModelGenratorAgent(EvaluatableAgent):
 
 
 class AIGeneratableService(Generic[AIGeneratableModelType]):
-    def __init__(self, model: Type[AIGeneratableModelType], llm_model: str = "gpt-5-mini"):
+    def __init__(
+        self,
+        model: Type[AIGeneratableModelType],
+        llm_model: str = "gpt-5-mini",
+        batch_mode: bool = False,
+        compact_schema: bool = False,
+    ):
+        """
+        ``batch_mode`` routes generation through the provider's batch API, for non-urgent backfills.
+        ``compact_schema`` sends the model schema without indentation to save input tokens.
+        """
         self.model = model
         self.llm_model = llm_model
-        self.agent = ModelGenratorAgent(model, llm_model)
+        self.agent = ModelGenratorAgent(model, llm_model, batch_mode, compact_schema)
 
     def _validate_inputs(
         self,
@@ -437,19 +949,26 @@ class AIGeneratableService(Generic[AIGeneratableModelType]):
         key_tags_map = {key: tag for key, tag in zip(cache_keys, tags)}
         key_data_map = {key: data for key, data in zip(cache_keys, raw_data)}
         key_default_values_map = {key: dv for key, dv in zip(cache_keys, default_values)}
-        uncached_keys = list(cache_service.get_uncached_keys(cache_keys))
+        items, uncached_keys = cache_service.get_cached_items(cache_keys)
         if uncached_keys:
             raw_data = [key_data_map[key] for key in uncached_keys]
             default_values = [key_default_values_map[key] for key in uncached_keys]
             tags = [key_tags_map[key] for key in uncached_keys]
             resps = self.agent.execute(raw_data, tags=tags)
-            new_items = []
-            for data, resp, defaults in zip(raw_data, resps, default_values):
+            new_items = dict()
+            for key, data, resp, defaults in zip(uncached_keys, raw_data, resps, default_values):
+                if resp is None:
+                    logger.error(f"Failed to generate {self.model.__name__} for {key}")
+                    continue
                 if defaults is None:
                     defaults = dict()
                 defaults["ai_summary"] = resp.summary
                 defaults["raw_data"] = data
-                model_obj = self.model.create_from_base_model(resp.model, defaults)
-                new_items.append(model_obj)
-            cache_service.set_cache_values(uncached_keys, new_items)
-        return cache_service.get_cached_values(cache_keys)
+                try:
+                    new_items[key] = self.model.create_from_base_model(resp.model, defaults)
+                except Exception as e:
+                    logger.error(f"Failed to create {self.model.__name__} for {key}: {e}")
+            # Failed keys are left uncached so the next call retries them.
+            cache_service.set_cache_values(list(new_items), list(new_items.values()))
+            items.update(new_items)
+        return [items.get(key) for key in cache_keys]
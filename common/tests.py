@@ -0,0 +1,326 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from pydantic import BaseModel
+
+from common.client import AsyncRestClient, RestClient
+from common.cache import CACHE_ENTRY_VERSION, LocalCache, cache_for, generate_cache_key
+from common.ratelimit import TokenBucket
+from common.services import BulkLLMCaller, CacheService, EmbeddingService, ModelReference
+from common.text import normalize_name
+from locations.enums import LocationLevel
+from locations.models import Location
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+FAKE_LLM_SETTINGS = {"default": {"base_url": "http://localhost:1/v1", "api_key": "fake"}}
+
+
+class Answer(BaseModel):
+    answer: str
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache_service = CacheService(
+            prefix="test-cache-service", local_cache_size=16, store_pks=True, deferred_fields=["embedding"]
+        )
+        self.cache_service.local_cache.clear()
+        self.location = Location.objects.create(name="Tehran", level=LocationLevel.CITY.value)
+
+    def test_stores_references_remotely_and_instances_locally(self):
+        self.cache_service.set_cache_values(["tehran"], [self.location])
+
+        key = self.cache_service.make_key("tehran")
+        self.assertEqual(cache.get(key), ModelReference("locations.location", self.location.pk))
+        with self.assertNumQueries(0):
+            hits, misses = self.cache_service.get_cached_items(["tehran"])
+        self.assertEqual(hits, {"tehran": self.location})
+        self.assertEqual(misses, [])
+
+    def test_remote_hits_are_hydrated_once(self):
+        self.cache_service.set_cache_values(["tehran"], [self.location])
+        self.cache_service.local_cache.clear()
+
+        with self.assertNumQueries(1):
+            hits, _ = self.cache_service.get_cached_items(["tehran"])
+        self.assertEqual(hits["tehran"].pk, self.location.pk)
+        with self.assertNumQueries(0):
+            self.cache_service.get_cached_items(["tehran"])
+
+    def test_references_to_deleted_rows_are_misses(self):
+        self.cache_service.set_cache_values(["tehran"], [self.location])
+        self.cache_service.local_cache.clear()
+        self.location.delete()
+
+        self.assertEqual(self.cache_service.get_cached_items(["tehran", "tehran"]), ({}, ["tehran"]))
+
+
+
+def unit_vector(*leading: float):
+    return list(leading) + [0.0] * (Location.get_embedding_dimensions() - len(leading))
+
+
+class EmbeddingServiceSimilarItemsTests(TestCase):
+    def setUp(self):
+        self.service = EmbeddingService(Location)
+        for name, embedding in [
+            ("Tehran", unit_vector(1, 0)),
+            ("Karaj", unit_vector(0.9, 0.1)),
+            ("Tabriz", unit_vector(0, 1)),
+            ("Unembedded", None),
+        ]:
+            Location.objects.create(name=name, level=LocationLevel.CITY.value, embedding=embedding)
+
+    def get_names(self, embeddings, **kwargs):
+        return [
+            sorted(json.loads(item)["name"] for item in items)
+            for items in self.service.get_similar_items_bulk(embeddings, **kwargs)
+        ]
+
+    def test_groups_neighbours_by_probe_in_input_order(self):
+        names = self.get_names([unit_vector(0, 1), unit_vector(1, 0)], k=3)
+
+        self.assertEqual(names, [["Karaj", "Tabriz", "Tehran"], ["Karaj", "Tabriz", "Tehran"]])
+        self.assertEqual(self.get_names([unit_vector(0, 1), unit_vector(1, 0)], k=1), [["Tabriz"], ["Tehran"]])
+
+    def test_applies_threshold_to_the_k_nearest(self):
+        names = self.get_names([unit_vector(1, 0), unit_vector(0, 1)], k=2, threshold=0.5)
+
+        self.assertEqual(names, [["Karaj", "Tehran"], ["Tabriz"]])
+
+    def test_probes_without_neighbours_get_empty_lists(self):
+        names = self.get_names([unit_vector(0, 0, 1), unit_vector(1, 0)], k=1, threshold=0.5)
+
+        self.assertEqual(names, [[], ["Tehran"]])
+        self.assertEqual(self.service.get_similar_items_bulk([]), [])
+
+    def test_serializes_only_the_pk_and_schema_fields(self):
+        [[item]] = self.service.get_similar_items_bulk([unit_vector(1, 0)], k=1)
+        tehran = Location.objects.get(name="Tehran")
+
+        self.assertEqual(json.loads(item), {"id": tehran.pk, "name": "Tehran", "level": LocationLevel.CITY.value})
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheForTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        @cache_for(60, key_prefix="test", poll_interval=0.01, early_refresh_beta=0)
+        def double(value):
+            calls.append(value)
+            time.sleep(0.2)
+            return value * 2
+
+        def call(_):
+            barrier.wait()
+            return double(21)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(call, range(8)))
+
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(calls, [21])
+
+    def test_waiters_raise_when_the_lock_holder_fails(self):
+        calls = []
+        started = threading.Event()
+
+        @cache_for(60, key_prefix="test", poll_interval=0.01, early_refresh_beta=0)
+        def fail(value):
+            calls.append(value)
+            started.set()
+            time.sleep(0.2)
+            raise RuntimeError("upstream is down")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            holder = executor.submit(fail, 1)
+            started.wait()
+            waiter = executor.submit(fail, 1)
+            with self.assertRaises(RuntimeError):
+                holder.result()
+            with self.assertRaises(ValueError):
+                waiter.result()
+        self.assertEqual(calls, [1])
+
+    def test_holder_does_not_release_a_lock_taken_over_by_another_caller(self):
+        @cache_for(60, key_prefix="test", early_refresh_beta=0)
+        def take_over(value):
+            cache.set(lock_key, "other-token", 60, version=CACHE_ENTRY_VERSION)
+            return value
+
+        lock_key = f"{generate_cache_key('test', 'take_over', 1)}:lock"
+        take_over(1)
+
+        self.assertEqual(cache.get(lock_key, version=CACHE_ENTRY_VERSION), "other-token")
+
+    def test_empty_results_are_negative_cached(self):
+        calls = []
+
+        @cache_for(60, key_prefix="test", early_refresh_beta=0)
+        def find(value):
+            calls.append(value)
+            return []
+
+        self.assertEqual(find(1), [])
+        self.assertEqual(find(1), [])
+        self.assertEqual(calls, [1])
+
+    def test_negative_caching_can_be_disabled(self):
+        calls = []
+
+        @cache_for(60, key_prefix="test", negative_ttl=0)
+        def find(value):
+            calls.append(value)
+            return None
+
+        self.assertIsNone(find(1))
+        self.assertIsNone(find(1))
+        self.assertEqual(calls, [1, 1])
+
+
+class NormalizeNameTests(SimpleTestCase):
+    def assertNormalizeSame(self, *names):
+        self.assertEqual(len({normalize_name(name) for name in names}), 1, names)
+
+    def test_arabic_variants_of_persian_letters(self):
+        self.assertNormalizeSame("كرج", "کرج")
+        self.assertNormalizeSame("علي", "علی", "على")
+        self.assertNormalizeSame("خانۀ", "خانه", "خانة")
+        self.assertNormalizeSame("أصفهان", "اصفهان", "إصفهان")
+
+    def test_zero_width_characters_and_tatweel(self):
+        self.assertNormalizeSame("می\u200cخواهم", "می خواهم", "می  خواهم")
+        self.assertNormalizeSame("تهـــران", "تهران", "ته\u200dران")
+
+    def test_digits(self):
+        self.assertNormalizeSame("منطقه ۲۲", "منطقه ٢٢", "منطقه 22")
+
+    def test_case_diacritics_and_whitespace(self):
+        self.assertNormalizeSame("Zürich ", "zurich", "  ZURICH")
+        self.assertNotEqual(normalize_name("Tehran"), normalize_name("Tabriz"))
+
+
+class LocalCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        local_cache = LocalCache(max_size=2, ttl=None)
+        local_cache.set_many({"a": 1, "b": 2})
+        local_cache.get_many(["a"])
+        local_cache.set_many({"c": 3})
+
+        self.assertEqual(local_cache.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+
+    @mock.patch("common.cache.time.monotonic")
+    def test_entries_expire_after_ttl(self, monotonic):
+        monotonic.return_value = 100.0
+        local_cache = LocalCache(max_size=2, ttl=10)
+        local_cache.set_many({"a": 1})
+
+        monotonic.return_value = 109.0
+        self.assertEqual(local_cache.get_many(["a"]), {"a": 1})
+        monotonic.return_value = 110.0
+        self.assertEqual(local_cache.get_many(["a"]), {})
+        self.assertEqual(local_cache.stats()["size"], 0)
+
+    def test_counts_hits_and_misses(self):
+        local_cache = LocalCache(max_size=2)
+        local_cache.set_many({"a": 1})
+        local_cache.get_many(["a", "b"])
+        local_cache.get_many(["a"])
+
+        self.assertEqual(local_cache.stats(), {"hits": 2, "misses": 1, "size": 1, "max_size": 2})
+
+
+@mock.patch("common.ratelimit.time.monotonic", return_value=100.0)
+class TokenBucketTests(SimpleTestCase):
+    def test_reserve_goes_into_debt_and_returns_the_wait(self, monotonic):
+        bucket = TokenBucket(per_minute=60, capacity=2)
+
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 1.0, 2.0])
+
+        monotonic.return_value = 102.0
+        self.assertEqual(bucket.reserve(), 1.0)
+
+    def test_refill_is_capped_at_capacity(self, monotonic):
+        bucket = TokenBucket(per_minute=60, capacity=2)
+        bucket.reserve(2)
+
+        monotonic.return_value = 1000.0
+        self.assertEqual(bucket.reserve(2), 0.0)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+    @mock.patch("common.ratelimit.time.sleep")
+    def test_acquire_sleeps_only_when_in_debt(self, sleep, monotonic):
+        bucket = TokenBucket(per_minute=120, capacity=1)
+
+        bucket.acquire()
+        sleep.assert_not_called()
+        bucket.acquire()
+        sleep.assert_called_once_with(0.5)
+
+
+@override_settings(LLM_SETTINGS=FAKE_LLM_SETTINGS)
+class BulkLLMCallerTests(SimpleTestCase):
+    def test_rate_limits_are_shared_per_model(self):
+        first = BulkLLMCaller(Answer, "shared-model", requests_per_minute=60, tokens_per_minute=1000)
+        second = BulkLLMCaller(Answer, "shared-model", requests_per_minute=60, tokens_per_minute=1000)
+        other = BulkLLMCaller(Answer, "other-model", requests_per_minute=60)
+
+        self.assertIs(first.requests_bucket, second.requests_bucket)
+        self.assertIs(first.tokens_bucket, second.tokens_bucket)
+        self.assertIsNot(first.requests_bucket, other.requests_bucket)
+        self.assertIsNone(other.tokens_bucket)
+
+    def test_openai_client_does_not_retry_on_its_own(self):
+        with mock.patch("common.services.ChatOpenAI") as chat_openai:
+            BulkLLMCaller(Answer, "shared-model")
+
+        self.assertEqual(chat_openai.call_args.kwargs["max_retries"], 0)
+
+
+class RestClientTests(SimpleTestCase):
+    def response(self, status_code, json_error=False):
+        response = mock.Mock(status_code=status_code, text="<html>")
+        response.json.side_effect = ValueError("not json") if json_error else None
+        response.json.return_value = {"ok": True}
+        return response
+
+    def test_sync_and_async_clients_report_requests_alike(self):
+        hook = mock.Mock()
+        client = RestClient("https://api.example", response_hook=hook)
+        client.get_default_headers = lambda: {"auth": "key"}
+        async_client = AsyncRestClient("https://api.example", response_hook=hook)
+
+        with mock.patch.object(client.session, "request", return_value=self.response(200)) as request:
+            result = client.get_json_response("/jobs/{id}", url_params={"id": 1}, headers={"x": "y"})
+        self.assertEqual(result, {"ok": True})
+        self.assertEqual(request.call_args.args[1], "https://api.example/jobs/1")
+        self.assertEqual(request.call_args.kwargs["headers"], {"auth": "key", "x": "y"})
+
+        with mock.patch.object(AsyncRestClient, "_request", return_value=self.response(502, json_error=True)):
+            self.assertEqual(asyncio.run(async_client.get_json_response("/jobs/{id}", url_params={"id": 1})), {})
+
+        self.assertEqual(
+            [call.args[:3] for call in hook.call_args_list],
+            [("GET", "https://api.example/jobs/1", 200), ("GET", "https://api.example/jobs/1", 502)],
+        )
+
+    def test_errors_are_logged_and_return_an_empty_dict(self):
+        hook = mock.Mock()
+        client = RestClient("https://api.example", response_hook=hook)
+
+        with mock.patch.object(client.session, "request", side_effect=ConnectionError("refused")):
+            self.assertEqual(client.get_json_response("/jobs/{id}", url_params={"id": 1}), {})
+        self.assertEqual(hook.call_args.args[:3], ("GET", "https://api.example/jobs/1", None))
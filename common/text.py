@@ -0,0 +1,36 @@
+import re
+import unicodedata
+
+
+PERSIAN_CHARACTERS = str.maketrans(
+    {
+        "ي": "ی",
+        "ى": "ی",
+        "ك": "ک",
+        "ة": "ه",
+        "ۀ": "ه",
+        "ە": "ه",
+        "أ": "ا",
+        "إ": "ا",
+        "ٱ": "ا",
+        "ـ": "",
+        "‌": " ",
+        "‍": "",
+        **{persian: str(i) for i, persian in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+        **{arabic: str(i) for i, arabic in enumerate("٠١٢٣٤٥٦٧٨٩")},
+    }
+)
+
+WHITESPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a name for exact matching.
+
+    Case, diacritics, compatibility forms, Arabic variants of Persian letters, non-ASCII digits and repeated or
+    zero-width spaces do not change the result, so "Zürich " and "zurich" or "كرج" and "کرج" normalize the same.
+    """
+    name = unicodedata.normalize("NFKD", name).translate(PERSIAN_CHARACTERS)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return WHITESPACES.sub(" ", unicodedata.normalize("NFC", name).casefold()).strip()
@@ -0,0 +1,132 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+from functools import cache
+from typing import Any, Dict, List
+
+from django.conf import settings
+from langfuse import get_client, propagate_attributes
+
+
+logger = logging.getLogger(__name__)
+
+
+class TraceExporter:
+    """
+    Sends agent observations to Langfuse from a background thread.
+
+    ``submit`` only samples and enqueues, so tracing never blocks the caller. The queue is bounded: when it is full
+    new observations are dropped and counted rather than waited for. The worker drains the queue in batches of up
+    to ``batch_size`` and flushes the Langfuse client every ``flush_interval`` seconds and on ``shutdown``.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+        sample_rate: float = 1.0,
+    ):
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def submit(self, observation: Dict[str, Any]) -> bool:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+
+        self.start()
+        try:
+            self.queue.put_nowait(observation)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            # Logging every drop would add to the load that filled the queue.
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"Trace queue is full, {dropped} observations dropped so far")
+            return False
+
+    def _take_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[Dict[str, Any]]):
+        langfuse = get_client()
+        for observation in batch:
+            try:
+                with propagate_attributes(tags=observation.pop("tags", None) or []):
+                    langfuse.start_observation(**observation).end()
+            except Exception as e:
+                logger.error(f"Failed to export trace observation: {e}")
+
+    def _flush(self):
+        try:
+            get_client().flush()
+        except Exception as e:
+            logger.error(f"Failed to flush traces: {e}")
+
+    def _run(self):
+        flushed_at = time.monotonic()
+        while not self._stopped.is_set():
+            batch = self._take_batch(timeout=min(1.0, self.flush_interval))
+            if batch:
+                self._export(batch)
+            if time.monotonic() - flushed_at >= self.flush_interval:
+                self._flush()
+                flushed_at = time.monotonic()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop the worker, export whatever is still queued and flush the Langfuse client."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            batch = self._take_batch(timeout=0)
+            if not batch:
+                break
+            self._export(batch)
+        self._flush()
+
+
+@cache
+def get_trace_exporter() -> TraceExporter:
+    exporter = TraceExporter(
+        max_queue_size=settings.TRACE_QUEUE_SIZE,
+        batch_size=settings.TRACE_BATCH_SIZE,
+        flush_interval=settings.TRACE_FLUSH_INTERVAL,
+        sample_rate=settings.TRACE_SAMPLE_RATE,
+    )
+    atexit.register(exporter.shutdown)
+    return exporter
+
+
+def flush_traces(timeout: float = 10.0):
+    """Export queued observations now, e.g. when a worker process shuts down."""
+    if get_trace_exporter.cache_info().currsize:
+        get_trace_exporter().shutdown(timeout)
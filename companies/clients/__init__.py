@@ -1,2 +1,16 @@
 from .yektanet import YektanetClient
 from .bitpin import BitpinClient
+
+
+CAREER_SITE_CLIENTS = {
+    "Yektanet": YektanetClient,
+    "Bitpin": BitpinClient,
+}
+_career_site_clients = dict()
+
+
+def get_career_site_client(name: str):
+    """Return the process-wide client instance for ``name``, so its HTTP connection pool is reused across tasks."""
+    if name not in _career_site_clients:
+        _career_site_clients[name] = CAREER_SITE_CLIENTS[name]()
+    return _career_site_clients[name]
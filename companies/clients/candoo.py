@@ -1,9 +1,13 @@
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+import json
+from typing import List, Dict, Any, Optional
 
 from django.conf import settings
 
-from common.client import RestClient
-from common.cache import cache_for
+from common.client import RestClient, AsyncRestClient
+from common.cache import cache_for, acache_for
+from common.services import CacheService
 from companies.enums import CompanySize
 from companies.dto import CompanyInfoDto, OpportunityDetailDto
 
@@ -36,29 +40,54 @@ BENEFITS = {
 }
 
 
-class CandooClient(RestClient):
-    def __init__(self, client_name: str, page_size: int = 100):
-        super().__init__("https://careerapi.hrcando.ir")
+CANDOO_API_URL = "https://careerapi.hrcando.ir"
+
+
+def fingerprint_job_details(job_details: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(job_details, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def build_opportunity_detail(
+    address: str, opportunity_id: str, job_details: Optional[dict]
+) -> Optional[OpportunityDetailDto]:
+    """Return None when the job details could not be fetched, so only that opportunity is skipped."""
+    if not job_details:
+        return None
+    return OpportunityDetailDto(
+        job_title=job_details.get("title"),
+        location_name=job_details.get("city", {}).get("name", "global"),
+        extra_info={
+            **job_details,
+            "job_page": f"{address}/job-detail/{opportunity_id}",
+        },
+        opportunity_id=opportunity_id,
+        fingerprint=fingerprint_job_details(job_details),
+    )
+
+
+class CandooAuthMixin:
+    """Authenticates the requests of a Candoo client as the career page of ``client_name``."""
+
+    def set_client(self, client_name: str):
         self.address = settings.CANDOO_HR_CLIENTS[client_name]["address"]
         self.auth_key = settings.CANDOO_HR_CLIENTS[client_name]["auth_key"]
         self.client_name = client_name
-        self.page_size = page_size
 
-    def get_json_response(
-        self,
-        url: str,
-        method: str = "GET",
-        url_params: dict = None,
-        data: dict = None,
-        headers: dict = None,
-        params: dict = None,
-        timeout: int = 10,
-    ) -> dict:
-        headers = {
+    def get_default_headers(self) -> dict:
+        return {
             "address": self.address,
             "careerauthkey": self.auth_key,
         }
-        return super().get_json_response(url, method, url_params, data, headers, params, timeout)
+
+
+class CandooClient(CandooAuthMixin, RestClient):
+    def __init__(self, client_name: str, page_size: int = 100):
+        super().__init__(CANDOO_API_URL)
+        self.set_client(client_name)
+        self.page_size = page_size
+        self.fingerprint_cache = CacheService(prefix=f"candoo:{client_name}:fingerprints", cache_ttl=90 * 24 * 60 * 60)
 
     def get_headers_and_footers(self) -> dict:
         @cache_for(24 * 60 * 60, key_prefix=f"candoo:{self.client_name}")
@@ -79,18 +108,37 @@ class CandooClient(RestClient):
             return [BENEFITS.get(benefit.get("benefitId")) for benefit in benefits.get("companyBenefitModuleDetailsList", [])]
         return _get_benefits()
 
-    def get_jobs(self) -> dict:
-        @cache_for(24 * 60 * 60, key_prefix=f"candoo:{self.client_name}")
-        def _get_jobs():
-            return self.get_json_response(
-                "/api/v1/CareerPage/GetCareerPageJobList",
-                "POST",
-                data={"take": self.page_size, "pageNumber": 1, "title": "", "departmentId": "", "cityId": "", "branchId": ""},
-            ).get("data")
-        return _get_jobs()
+    def get_jobs(self, page_number: int = 1) -> dict:
+        jobs = self.get_json_response(
+            "/api/v1/CareerPage/GetCareerPageJobList",
+            "POST",
+            data={"take": self.page_size, "pageNumber": page_number, "title": "", "departmentId": "", "cityId": "", "branchId": ""},
+        ).get("data")
+        if not isinstance(jobs, dict) or "jobs" not in jobs:
+            # A failed page must not pass for the end of the listing, or every job after it would be deactivated.
+            raise ValueError(f"Failed to get page {page_number} of the {self.client_name} job list")
+        return jobs
+
+    def get_job_list(self) -> List[dict]:
+        """
+        Walk the job list page by page until an empty or short page. The walk is cached as a whole, so the pages
+        are always consistent with each other, and a failed walk raises instead of being cached.
+        """
+        @cache_for(24 * 60 * 60, key_prefix=f"candoo:{self.client_name}", lock_timeout=5 * 60, negative_ttl=0)
+        def _get_job_list(page_size):
+            job_list = []
+            page_number = 1
+            while True:
+                jobs = self.get_jobs(page_number)["jobs"] or []
+                job_list.extend(jobs)
+                if len(jobs) < page_size:
+                    return job_list
+                page_number += 1
+        return _get_job_list(self.page_size)
 
     def get_job_details(self, job_guid: str) -> dict:
-        @cache_for(24 * 60 * 60, key_prefix=f"candoo:{self.client_name}")
+        # Failed fetches are not cached, so the next sync retries them.
+        @cache_for(24 * 60 * 60, key_prefix=f"candoo:{self.client_name}", negative_ttl=0)
         def _get_job_details(job_guid):
             return self.get_json_response(
                 f"/api/v1/CareerPage/GetCareerPageJobPageInfoByJobGuid/{job_guid}",
@@ -118,17 +166,59 @@ class CandooClient(RestClient):
         )
 
     def get_opportunities_id(self) -> List[str]:
-        return [job.get("jobGuid") for job in self.get_jobs().get("jobs")]
+        return [job.get("jobGuid") for job in self.get_job_list()]
 
 
-    def get_opportunity_detail(self, opportunity_id: str) -> OpportunityDetailDto:
-        job_details = self.get_job_details(opportunity_id)
-        return OpportunityDetailDto(
-            job_title=job_details.get("title"),
-            location_name=job_details.get("city", {}).get("name", "global"),
-            extra_info={
-                **job_details,
-                "job_page": f"{self.address}/job-detail/{opportunity_id}",
-            },
+    def get_opportunity_detail(self, opportunity_id: str) -> Optional[OpportunityDetailDto]:
+        return build_opportunity_detail(self.address, opportunity_id, self.get_job_details(opportunity_id))
+
+    def get_opportunity_details(self, opportunity_ids: List[str]) -> List[Optional[OpportunityDetailDto]]:
+        return asyncio.run(AsyncCandooClient(self.client_name).get_opportunity_details(opportunity_ids))
+
+    def get_changed_opportunity_details(
+        self, opportunity_details: List[OpportunityDetailDto]
+    ) -> List[OpportunityDetailDto]:
+        fingerprints, _ = self.fingerprint_cache.get_cached_items(
+            [opportunity_detail.opportunity_id for opportunity_detail in opportunity_details]
         )
+        return [
+            opportunity_detail
+            for opportunity_detail in opportunity_details
+            if fingerprints.get(opportunity_detail.opportunity_id) != opportunity_detail.fingerprint
+        ]
+
+    def record_opportunity_details(self, opportunity_details: List[OpportunityDetailDto]):
+        self.fingerprint_cache.set_cache_values(
+            [opportunity_detail.opportunity_id for opportunity_detail in opportunity_details],
+            [opportunity_detail.fingerprint for opportunity_detail in opportunity_details],
+        )
+
+
+class AsyncCandooClient(CandooAuthMixin, AsyncRestClient):
+    """asyncio variant of CandooClient for fetching many job pages concurrently, sharing its cache entries."""
+
+    def __init__(self, client_name: str, max_concurrency: int = 10):
+        super().__init__(CANDOO_API_URL, max_concurrency=max_concurrency)
+        self.set_client(client_name)
+
+    async def get_job_details(self, job_guid: str) -> dict:
+        # Named like CandooClient's inner function so both share the same cache entries.
+        @acache_for(24 * 60 * 60, key_prefix=f"candoo:{self.client_name}", negative_ttl=0)
+        async def _get_job_details(job_guid):
+            return (
+                await self.get_json_response(
+                    f"/api/v1/CareerPage/GetCareerPageJobPageInfoByJobGuid/{job_guid}",
+                    "GET",
+                    url_params={"job_guid": job_guid},
+                )
+            ).get("data")
+        return await _get_job_details(job_guid)
+
+    async def get_opportunity_details(self, opportunity_ids: List[str]) -> List[Optional[OpportunityDetailDto]]:
+        async with self:
+            jobs_details = await asyncio.gather(*[self.get_job_details(job_id) for job_id in opportunity_ids])
+        return [
+            build_opportunity_detail(self.address, job_id, job_details)
+            for job_id, job_details in zip(opportunity_ids, jobs_details)
+        ]
 
@@ -18,3 +18,6 @@ class OpportunityDetailDto:
     job_title: Optional[str]
     location_name: str
     extra_info: Dict[str, Any]
+    opportunity_id: Optional[str] = None
+    # Hash of the career site payload, used to skip opportunities that did not change since they were processed.
+    fingerprint: Optional[str] = None
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from abc import ABC, abstractmethod
 
 from companies.dto import CompanyInfoDto, OpportunityDetailDto
@@ -14,5 +14,19 @@ class CareerSiteClient(ABC):
         pass
 
     @abstractmethod
-    def get_opportunity_detail(self, opportunity_id: str) -> OpportunityDetailDto:
+    def get_opportunity_detail(self, opportunity_id: str) -> Optional[OpportunityDetailDto]:
+        """Return None when the detail could not be fetched."""
+        pass
+
+    def get_opportunity_details(self, opportunity_ids: List[str]) -> List[Optional[OpportunityDetailDto]]:
+        return [self.get_opportunity_detail(opportunity_id) for opportunity_id in opportunity_ids]
+
+    def get_changed_opportunity_details(
+        self, opportunity_details: List[OpportunityDetailDto]
+    ) -> List[OpportunityDetailDto]:
+        """Return the details whose payload changed since they were last recorded; clients without change detection return all of them."""
+        return opportunity_details
+
+    def record_opportunity_details(self, opportunity_details: List[OpportunityDetailDto]):
+        """Remember the fingerprints of successfully processed details."""
         pass
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:12
+
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_perk_name_index'),
+        ('locations', '0003_location_halfvec_embedding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='embedding',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=3072, null=True),
+        ),
+        migrations.AlterField(
+            model_name='perk',
+            name='embedding',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=3072, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=pgvector.django.indexes.HnswIndex(fields=['embedding'], name='company_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='perk',
+            index=pgvector.django.indexes.HnswIndex(fields=['embedding'], name='perk_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
@@ -4,20 +4,22 @@ import requests
 from urllib.parse import urlparse
 import os
 
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from pgvector.django import HalfVectorField
 from django.core.files.base import ContentFile
 from pydantic import BaseModel, Field
 
 from companies.enums import CompanySize
 from companies.storages import CompanyLogoStorage
 from locations.models import Location
-from common.models import TimedModel, EmbeddedModelLargeMixin, AIGeneratableMixin
+from common.models import TimedModel, EmbeddedModelLargeMixin, AIGeneratableMixin, NameIndexedMixin, embedding_index
 
 
 logger = logging.getLogger(__name__)
 
 
-class Perk(TimedModel, EmbeddedModelLargeMixin):
+class Perk(NameIndexedMixin, TimedModel, EmbeddedModelLargeMixin):
     SCHEMA_FIELDS = ["name"]
 
     class ModelBaseModel(BaseModel):
@@ -26,6 +28,7 @@ class Perk(TimedModel, EmbeddedModelLargeMixin):
 
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField()
+    embedding = HalfVectorField(dimensions=256, null=True)
 
     def get_embedding_key(self) -> str:
         return f"{self.name}: {self.description}"
@@ -47,6 +50,10 @@ class Perk(TimedModel, EmbeddedModelLargeMixin):
     class Meta:
         verbose_name = "Perk"
         verbose_name_plural = "Perks"
+        indexes = [
+            GinIndex(fields=["aliases"], name="perk_aliases_gin"),
+            embedding_index("perk_embedding_hnsw"),
+        ]
 
 
 class Company(EmbeddedModelLargeMixin, AIGeneratableMixin, TimedModel):
@@ -153,3 +160,4 @@ class Company(EmbeddedModelLargeMixin, AIGeneratableMixin, TimedModel):
         verbose_name = "Company"
         verbose_name_plural = "Companies"
         ordering = ["-created_at"]
+        indexes = [embedding_index("company_embedding_hnsw")]
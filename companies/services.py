@@ -12,7 +12,9 @@ from locations.services import LocationService
 class PerkService:
     def __init__(self):
         self.perk_embedding_srv = EmbeddingService(Perk)
-        self.cache_service = CacheService(prefix="perk-service")
+        self.cache_service = CacheService(
+            prefix="perk-service", local_cache_size=1024, store_pks=True, deferred_fields=["embedding"]
+        )
 
     def get_or_create_perks(self, perk_names: List[str]) -> List[Perk]:
         return self.perk_embedding_srv.get_or_create_items(
@@ -33,14 +35,19 @@ class CompanyService:
         self.location_service = location_service
         self.perk_service = perk_service
         self.cache_ttl = cache_ttl
-        self.cache_service = CacheService(prefix="company-service")
+        self.cache_service = CacheService(
+            prefix="company-service", store_pks=True, deferred_fields=["embedding", "raw_data"]
+        )
 
     def get_or_create_company(self) -> Company:
         company_info = self.careers_site_client.get_company_info()
         perks = self.perk_service.get_or_create_perks([perk for perk in company_info.perks if perk])
         location = self.location_service.get_or_create_locations([company_info.location_name])[0]
+        # Generating without them would cache the company with missing perks or location for good.
+        if location is None or None in perks:
+            raise ValueError(f"Failed to resolve the location or perks of company {company_info.company_name}")
 
-        return self.company_gen_srv.generate_models_from_raw_data(
+        company = self.company_gen_srv.generate_models_from_raw_data(
             [company_info.extra_info],
             self.cache_service,
             default_values=[
@@ -54,3 +61,6 @@ class CompanyService:
             tags=[["company-service", company_info.company_name]],
             cache_keys=[company_info.company_name],
         )[0]
+        if company is None:
+            raise ValueError(f"Failed to get or create company {company_info.company_name}")
+        return company
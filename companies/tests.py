@@ -1,3 +1,51 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from companies.clients.candoo import AsyncCandooClient, CandooClient
+
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CandooClientTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = CandooClient("Yektanet", page_size=2)
+
+    def page(self, *job_guids):
+        return {"data": {"jobs": [{"jobGuid": job_guid} for job_guid in job_guids]}}
+
+    def test_walks_pages_until_a_short_one(self):
+        with mock.patch.object(
+            CandooClient, "get_json_response", side_effect=[self.page("1", "2"), self.page("3")]
+        ) as get_json_response:
+            self.assertEqual(self.client.get_opportunities_id(), ["1", "2", "3"])
+            self.assertEqual(self.client.get_opportunities_id(), ["1", "2", "3"])
+        self.assertEqual(get_json_response.call_count, 2)
+
+    def test_failed_page_raises_and_is_not_cached(self):
+        with mock.patch.object(CandooClient, "get_json_response", side_effect=[self.page("1", "2"), {}]):
+            with self.assertRaises(ValueError):
+                self.client.get_opportunities_id()
+
+        with mock.patch.object(
+            CandooClient, "get_json_response", side_effect=[self.page("1", "2"), self.page("3")]
+        ):
+            self.assertEqual(self.client.get_opportunities_id(), ["1", "2", "3"])
+
+    def test_failed_job_details_are_skipped_and_not_cached(self):
+        job_details = {"data": {"title": "Engineer", "city": {"name": "Tehran"}}}
+        with mock.patch.object(
+            AsyncCandooClient, "get_json_response", side_effect=[job_details, {}]
+        ) as get_json_response:
+            details = self.client.get_opportunity_details(["1", "2"])
+        self.assertEqual(get_json_response.call_count, 2)
+        self.assertEqual(details[0].job_title, "Engineer")
+        self.assertIsNone(details[1])
+
+        with mock.patch.object(AsyncCandooClient, "get_json_response", side_effect=[job_details]):
+            details = self.client.get_opportunity_details(["1", "2"])
+        self.assertEqual(details[1].job_title, "Engineer")
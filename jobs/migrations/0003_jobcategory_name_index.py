@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:10
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from common.text import normalize_name
+
+
+def fill_normalized_names(apps, schema_editor):
+    JobCategory = apps.get_model("jobs", "JobCategory")
+    objs = list(JobCategory.objects.only("id", "name"))
+    for obj in objs:
+        obj.normalized_name = normalize_name(obj.name)
+    JobCategory.objects.bulk_update(objs, ["normalized_name"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_add_default_job_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobcategory',
+            name='aliases',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='jobcategory',
+            name='normalized_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='jobcategory',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['aliases'], name='jobcategory_aliases_gin'),
+        ),
+        migrations.RunPython(fill_normalized_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:12
+
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_halfvec_embedding'),
+        ('jobs', '0003_jobcategory_name_index'),
+        ('locations', '0003_location_halfvec_embedding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobcategory',
+            name='embedding',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=3072, null=True),
+        ),
+        migrations.AlterField(
+            model_name='opportunity',
+            name='embedding',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=3072, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='jobcategory',
+            index=pgvector.django.indexes.HnswIndex(fields=['embedding'], name='jobcategory_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=pgvector.django.indexes.HnswIndex(fields=['embedding'], name='opportunity_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:14
+
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_halfvec_embedding'),
+        ('jobs', '0004_halfvec_embedding'),
+        ('locations', '0003_location_halfvec_embedding'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='opportunity',
+            name='opportunity_embedding_hnsw',
+        ),
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=128, fields=['embedding'], m=24, name='opportunity_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:15
+
+import pgvector.django.halfvec
+from django.db import migrations
+
+
+# text-embedding-3 embeddings shortened to their leading dimensions and renormalized match what the API returns
+# for the shorter size, so existing rows are converted in place. Reverting clears them for embedding again.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_opportunity_hnsw_parameters'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE jobs_jobcategory ALTER COLUMN embedding TYPE halfvec(256) "
+                    "USING l2_normalize(subvector(embedding, 1, 256))",
+                    reverse_sql="ALTER TABLE jobs_jobcategory ALTER COLUMN embedding TYPE halfvec(3072) USING NULL",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='jobcategory',
+                    name='embedding',
+                    field=pgvector.django.halfvec.HalfVectorField(dimensions=256, null=True),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE jobs_opportunity ALTER COLUMN embedding TYPE halfvec(1024) "
+                    "USING l2_normalize(subvector(embedding, 1, 1024))",
+                    reverse_sql="ALTER TABLE jobs_opportunity ALTER COLUMN embedding TYPE halfvec(3072) USING NULL",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='opportunity',
+                    name='embedding',
+                    field=pgvector.django.halfvec.HalfVectorField(dimensions=1024, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -1,6 +1,8 @@
 from typing import Dict, Any, Optional, Literal
 
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from pgvector.django import HalfVectorField
 from pydantic import BaseModel, Field
 
 from companies.models import Company
@@ -8,10 +10,10 @@ from jobs.enums import Gender, MilitaryService
 from common.enums import ContractType, EducationLevel, Currency, Language, ExperienceLevel
 from locations.enums import LocationType
 from locations.models import Location
-from common.models import AIGeneratableMixin, TimedModel, EmbeddedModelLargeMixin
+from common.models import AIGeneratableMixin, TimedModel, EmbeddedModelLargeMixin, NameIndexedMixin, embedding_index
 
 
-class JobCategory(TimedModel, EmbeddedModelLargeMixin):
+class JobCategory(NameIndexedMixin, TimedModel, EmbeddedModelLargeMixin):
     SCHEMA_FIELDS = ["name", "description"]
 
     class ModelBaseModel(BaseModel):
@@ -20,6 +22,7 @@ class JobCategory(TimedModel, EmbeddedModelLargeMixin):
 
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField()
+    embedding = HalfVectorField(dimensions=256, null=True)
 
     def get_embedding_key(self) -> str:
         return self.name
@@ -41,6 +44,10 @@ class JobCategory(TimedModel, EmbeddedModelLargeMixin):
     class Meta:
         verbose_name = "Job Category"
         verbose_name_plural = "Job Categories"
+        indexes = [
+            GinIndex(fields=["aliases"], name="jobcategory_aliases_gin"),
+            embedding_index("jobcategory_embedding_hnsw"),
+        ]
 
 
 class Opportunity(EmbeddedModelLargeMixin, AIGeneratableMixin, TimedModel):
@@ -125,6 +132,7 @@ class Opportunity(EmbeddedModelLargeMixin, AIGeneratableMixin, TimedModel):
     raw_data = models.JSONField(null=True, blank=True)
     ai_summary = models.TextField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    embedding = HalfVectorField(dimensions=1024, null=True)
 
     @classmethod
     def create_from_base_model(cls, base_model: ModelBaseModel, default_values: Optional[Dict[str, Any]] = None):
@@ -184,3 +192,5 @@ class Opportunity(EmbeddedModelLargeMixin, AIGeneratableMixin, TimedModel):
     class Meta:
         verbose_name = "Opportunity"
         verbose_name_plural = "Opportunities"
+        # The catalog keeps growing, so the index trades build time for recall at scale.
+        indexes = [embedding_index("opportunity_embedding_hnsw", m=24, ef_construction=128)]
@@ -1,5 +1,6 @@
 import json
-from typing import List
+import logging
+from typing import List, Tuple
 
 from companies.interfaces import CareerSiteClient
 from jobs.models import Opportunity, JobCategory
@@ -8,10 +9,15 @@ from companies.services import CompanyService
 from locations.services import LocationService
 
 
+logger = logging.getLogger(__name__)
+
+
 class JobCategoryService:
     def __init__(self):
         self.job_category_embedding_srv = EmbeddingService(JobCategory)
-        self.cache_service = CacheService(prefix="job-category-service")
+        self.cache_service = CacheService(
+            prefix="job-category-service", local_cache_size=1024, store_pks=True, deferred_fields=["embedding"]
+        )
         
     def get_or_create_job_categories(self, job_category_names: List[str]) -> List[JobCategory]:
         return self.job_category_embedding_srv.get_or_create_items(
@@ -34,13 +40,46 @@ class OpportunityService:
         self.location_service = location_service
         self.company_service = company_service
         self.job_category_service = job_category_service
-        self.cache_service = CacheService(prefix="opportunity-service")
+        self.cache_service = CacheService(
+            prefix="opportunity-service", store_pks=True, deferred_fields=["embedding", "raw_data"]
+        )
 
     def get_or_create_opportunities(self, job_ids: List[str]) -> List[Opportunity]:
+        """
+        Create the opportunities that are not active yet and update the ones whose career site payload changed
+        since they were last processed. Unchanged opportunities are skipped.
+        """
         company = self.company_service.get_or_create_company()
+        # Opportunities listed again after being deactivated go through change detection like active ones. Left
+        # inactive, they would be regenerated from the cached inactive row and their fingerprint recorded.
+        Opportunity.objects.filter(company=company, is_active=False, reference_id__in=job_ids).update(is_active=True)
+        active_ids = set(
+            Opportunity.objects.filter(company=company, is_active=True, reference_id__in=job_ids).values_list(
+                "reference_id", flat=True
+            )
+        )
         opportunities_detail = []
-        for job_id in job_ids:
-            opportunities_detail.append(self.careers_site_client.get_opportunity_detail(job_id))
+        for job_id, opportunity_detail in zip(job_ids, self.careers_site_client.get_opportunity_details(job_ids)):
+            # A detail that failed to fetch is skipped on its own and retried by the next sync.
+            if opportunity_detail is not None:
+                opportunity_detail.opportunity_id = job_id
+                opportunities_detail.append(opportunity_detail)
+        if len(opportunities_detail) < len(job_ids):
+            logger.warning(
+                f"Skipping {len(job_ids) - len(opportunities_detail)} opportunities of {company.name} "
+                f"whose details could not be fetched"
+            )
+        known_details = [detail for detail in opportunities_detail if detail.opportunity_id in active_ids]
+        changed_ids = {
+            detail.opportunity_id for detail in self.careers_site_client.get_changed_opportunity_details(known_details)
+        }
+        opportunities_detail = [
+            detail
+            for detail in opportunities_detail
+            if detail.opportunity_id not in active_ids or detail.opportunity_id in changed_ids
+        ]
+        if not opportunities_detail:
+            return []
 
         location_names = [opportunity_detail.location_name for opportunity_detail in opportunities_detail]
         locations = self.location_service.get_or_create_locations(location_names)
@@ -48,13 +87,62 @@ class OpportunityService:
         job_category_names = [opportunity_detail.job_title for opportunity_detail in opportunities_detail]
         job_categories = self.job_category_service.get_or_create_job_categories(job_category_names)
 
-        return self.opportunity_gen_srv.generate_models_from_raw_data(
+        # Opportunities whose location or category failed to resolve are left for the next sync to retry, rather
+        # than generated, cached and recorded without them.
+        resolved = [
+            (opportunity_detail, location, category)
+            for opportunity_detail, location, category in zip(opportunities_detail, locations, job_categories)
+            if location is not None and category is not None
+        ]
+        if len(resolved) < len(opportunities_detail):
+            logger.warning(
+                f"Skipping {len(opportunities_detail) - len(resolved)} opportunities of {company.name} "
+                f"whose location or category could not be resolved"
+            )
+        if not resolved:
+            return []
+        opportunities_detail = [opportunity_detail for opportunity_detail, _, _ in resolved]
+        job_ids = [opportunity_detail.opportunity_id for opportunity_detail in opportunities_detail]
+
+        opportunities = self.opportunity_gen_srv.generate_models_from_raw_data(
             [opportunity_detail.extra_info for opportunity_detail in opportunities_detail],
             self.cache_service,
             default_values=[
                 {"company": company, "location": location, "reference_id": job_id, "category": category}
-                for job_id, location, category in zip(job_ids, locations, job_categories)
+                for job_id, (_, location, category) in zip(job_ids, resolved)
             ],
             tags=[["job-service", company.name, job_id] for job_id in job_ids],
-            cache_keys=[f"{company.name}:{job_id}" for job_id in job_ids],
+            cache_keys=[
+                f"{company.name}:{opportunity_detail.opportunity_id}:{opportunity_detail.fingerprint or ''}"
+                for opportunity_detail in opportunities_detail
+            ],
+        )
+        self.careers_site_client.record_opportunity_details(
+            [
+                opportunity_detail
+                for opportunity_detail, opportunity in zip(opportunities_detail, opportunities)
+                if opportunity is not None
+            ]
+        )
+        return [opportunity for opportunity in opportunities if opportunity is not None]
+
+    def deactivate_missing_opportunities(self, job_ids: List[str]) -> int:
+        """Deactivate, in a single UPDATE, the company's active opportunities that are no longer listed."""
+        company = self.company_service.get_or_create_company()
+        return (
+            Opportunity.objects.filter(company=company, is_active=True)
+            .exclude(reference_id__in=job_ids)
+            .update(is_active=False)
         )
+
+    def list_and_deactivate_opportunities(self) -> Tuple[List[str], int]:
+        """
+        List the company's opportunities and deactivate the ones that are no longer listed. Returns the listed ids
+        and the number of deactivated opportunities.
+        """
+        job_ids = list(dict.fromkeys(self.careers_site_client.get_opportunities_id()))
+        if not job_ids:
+            # An empty listing is far more likely a failed request than a company without openings.
+            logger.warning(f"No opportunities listed by {self.careers_site_client}, skipping deactivation")
+            return [], 0
+        return job_ids, self.deactivate_missing_opportunities(job_ids)
@@ -1,8 +1,10 @@
 import logging
+from typing import List, Dict, Any, Optional
 
-from celery import shared_task
+from celery import shared_task, group, chord
 
-from companies.clients import YektanetClient, BitpinClient
+from common.locks import DistributedLock
+from companies.clients import CAREER_SITE_CLIENTS, get_career_site_client
 from jobs.services import OpportunityService
 from locations.services import LocationService
 from companies.services import CompanyService, PerkService
@@ -10,22 +12,90 @@ from jobs.services import JobCategoryService
 
 
 logger = logging.getLogger(__name__)
-clients = [YektanetClient(), BitpinClient()]
+OPPORTUNITIES_BATCH_SIZE = 20
+SYNC_LOCK_LEASE = 10 * 60
+SYNC_LOCK_RETRY_COUNTDOWN = 5 * 60
+
+
+def get_sync_lock(client_name: str, token: Optional[str] = None) -> DistributedLock:
+    return DistributedLock(f"opportunity-sync:{client_name}", lease=SYNC_LOCK_LEASE, token=token)
+
+
+def get_opportunity_service(client_name: str) -> OpportunityService:
+    client = get_career_site_client(client_name)
+    location_service = LocationService()
+    company_service = CompanyService(client, location_service, PerkService())
+    return OpportunityService(client, location_service, company_service, JobCategoryService())
 
 
 @shared_task
 def update_opportunities():
-    location_service = LocationService()
-    job_category_service = JobCategoryService()
-    perk_service = PerkService()
-    for client in clients:
-        company_service = CompanyService(client, location_service, perk_service)
-        opportunity_service = OpportunityService(client, location_service, company_service, job_category_service)
-        try:
-            try:
-                opportunity_service.get_or_create_opportunities(client.get_opportunities_id())
-                logger.info(f"Processed opportunities from {client}")
-            except Exception as e:
-                logger.error(f"Failed to process opportunities from {client}: {e}")
-        except Exception as e:
-            logger.error(f"Failed to fetch opportunities from {client}: {e}")
+    group(sync_company_opportunities.s(client_name) for client_name in CAREER_SITE_CLIENTS).apply_async()
+
+
+@shared_task(bind=True, max_retries=3)
+def sync_company_opportunities(
+    self, client_name: str, batch_size: int = OPPORTUNITIES_BATCH_SIZE, wait_if_locked: bool = False
+):
+    """
+    Sync one company's opportunities under a per-company lock, so overlapping runs do not pay twice for the
+    same generations. The lock is handed over to the batch tasks and released by the chord callback; if a run
+    dies midway it expires with its lease. A run that finds the lock taken is skipped, or retried later when
+    ``wait_if_locked`` is set.
+    """
+    lock = get_sync_lock(client_name)
+    if not lock.acquire():
+        if wait_if_locked:
+            raise self.retry(countdown=SYNC_LOCK_RETRY_COUNTDOWN)
+        logger.info(f"Opportunities from {client_name} are already being synced, skipping")
+        return
+
+    opportunity_service = get_opportunity_service(client_name)
+    try:
+        with lock.heartbeat():
+            job_ids, deactivated = opportunity_service.list_and_deactivate_opportunities()
+    except Exception as e:
+        logger.error(f"Failed to fetch opportunities from {client_name}: {e}")
+        lock.release()
+        return
+    if not job_ids:
+        lock.release()
+        return
+
+    batches = [job_ids[i : i + batch_size] for i in range(0, len(job_ids), batch_size)]
+    # Nothing heartbeats the lock while the batches wait in the queue, so the lease has to cover all of them
+    # running one after another; the batch heartbeats never shorten it.
+    lock.extend(SYNC_LOCK_LEASE * len(batches))
+    chord(process_opportunities_batch.s(client_name, batch, lock.token) for batch in batches)(
+        summarize_opportunities_sync.s(client_name, len(job_ids), deactivated, lock.token)
+    )
+
+
+@shared_task
+def process_opportunities_batch(client_name: str, job_ids: List[str], lock_token: str) -> Dict[str, int]:
+    lock = get_sync_lock(client_name, lock_token)
+    try:
+        # Inside the try so that a client that fails to build still reports the batch as failed to the chord.
+        opportunity_service = get_opportunity_service(client_name)
+        with lock.heartbeat():
+            opportunities = opportunity_service.get_or_create_opportunities(job_ids)
+    except Exception as e:
+        logger.error(f"Failed to process opportunities {job_ids} from {client_name}: {e}")
+        return {"processed": 0, "failed": len(job_ids)}
+    return {"processed": len(opportunities), "failed": 0}
+
+
+@shared_task
+def summarize_opportunities_sync(
+    results: List[Dict[str, int]], client_name: str, listed: int, deactivated: int, lock_token: str
+) -> Dict[str, Any]:
+    get_sync_lock(client_name, lock_token).release()
+    stats = {
+        "client": client_name,
+        "listed": listed,
+        "processed": sum(result["processed"] for result in results),
+        "failed": sum(result["failed"] for result in results),
+        "deactivated": deactivated,
+    }
+    logger.info(f"Processed opportunities from {client_name}: {stats}")
+    return stats
@@ -1,3 +1,113 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from companies.dto import OpportunityDetailDto
+from companies.enums import CompanySize
+from companies.models import Company
+from jobs.models import Opportunity
+from jobs.services import OpportunityService
+from jobs.tasks import process_opportunities_batch
+
+
+class OpportunityServiceTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Acme", description="Acme", page="https://acme.example", size=CompanySize.SMALL.value
+        )
+        self.client = mock.Mock()
+        self.company_service = mock.Mock()
+        self.company_service.get_or_create_company.return_value = self.company
+        self.location_service = mock.Mock()
+        self.job_category_service = mock.Mock()
+        self.service = OpportunityService(
+            self.client, self.location_service, self.company_service, self.job_category_service
+        )
+        self.service.opportunity_gen_srv = mock.Mock()
+
+    def create_opportunity(self, reference_id: str, is_active: bool = True) -> Opportunity:
+        return Opportunity.objects.create(
+            reference_id=reference_id,
+            job_page=f"https://acme.example/{reference_id}",
+            title=reference_id,
+            description=reference_id,
+            company=self.company,
+            is_active=is_active,
+        )
+
+    def test_listed_inactive_opportunity_is_reactivated(self):
+        opportunity = self.create_opportunity("1", is_active=False)
+        self.client.get_opportunity_details.return_value = [
+            OpportunityDetailDto(job_title="Engineer", location_name="Tehran", extra_info={}, fingerprint="same")
+        ]
+        self.client.get_changed_opportunity_details.return_value = []
+
+        self.assertEqual(self.service.get_or_create_opportunities(["1"]), [])
+
+        opportunity.refresh_from_db()
+        self.assertTrue(opportunity.is_active)
+        self.service.opportunity_gen_srv.generate_models_from_raw_data.assert_not_called()
+
+    def test_opportunities_whose_details_failed_are_skipped(self):
+        detail = OpportunityDetailDto(job_title="Engineer", location_name="Tehran", extra_info={"id": 1})
+        self.client.get_opportunity_details.return_value = [None, detail]
+        self.client.get_changed_opportunity_details.return_value = []
+        self.location_service.get_or_create_locations.return_value = [mock.Mock()]
+        self.job_category_service.get_or_create_job_categories.return_value = [mock.Mock()]
+        self.service.opportunity_gen_srv.generate_models_from_raw_data.return_value = [mock.Mock()]
+
+        self.service.get_or_create_opportunities(["1", "2"])
+
+        self.assertEqual(detail.opportunity_id, "2")
+        args, kwargs = self.service.opportunity_gen_srv.generate_models_from_raw_data.call_args
+        self.assertEqual(args[0], [{"id": 1}])
+        self.assertEqual(kwargs["default_values"][0]["reference_id"], "2")
+
+    def test_opportunities_with_unresolved_dependencies_are_not_generated(self):
+        details = [
+            OpportunityDetailDto(job_title="Engineer", location_name="Tehran", extra_info={"id": 1}),
+            OpportunityDetailDto(job_title="Designer", location_name="Nowhere", extra_info={"id": 2}),
+        ]
+        self.client.get_opportunity_details.return_value = details
+        self.client.get_changed_opportunity_details.return_value = []
+        location, category = mock.Mock(), mock.Mock()
+        self.location_service.get_or_create_locations.return_value = [location, None]
+        self.job_category_service.get_or_create_job_categories.return_value = [category, category]
+        opportunity = mock.Mock()
+        self.service.opportunity_gen_srv.generate_models_from_raw_data.return_value = [opportunity]
+
+        self.assertEqual(self.service.get_or_create_opportunities(["1", "2"]), [opportunity])
+
+        args, kwargs = self.service.opportunity_gen_srv.generate_models_from_raw_data.call_args
+        self.assertEqual(args[0], [{"id": 1}])
+        self.assertEqual(kwargs["default_values"][0]["location"], location)
+        self.client.record_opportunity_details.assert_called_once_with([details[0]])
+
+    def test_missing_opportunities_are_deactivated(self):
+        listed = self.create_opportunity("1")
+        missing = self.create_opportunity("2")
+        self.client.get_opportunities_id.return_value = ["1", "1"]
+
+        self.assertEqual(self.service.list_and_deactivate_opportunities(), (["1"], 1))
+
+        listed.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertTrue(listed.is_active)
+        self.assertFalse(missing.is_active)
+
+    def test_empty_listing_deactivates_nothing(self):
+        opportunity = self.create_opportunity("1")
+        self.client.get_opportunities_id.return_value = []
+
+        self.assertEqual(self.service.list_and_deactivate_opportunities(), ([], 0))
+
+        opportunity.refresh_from_db()
+        self.assertTrue(opportunity.is_active)
+
+
+class ProcessOpportunitiesBatchTests(SimpleTestCase):
+    @mock.patch("jobs.tasks.get_opportunity_service", side_effect=ValueError("Unknown client"))
+    def test_failing_client_reports_the_whole_batch_as_failed(self, get_opportunity_service):
+        self.assertEqual(
+            process_opportunities_batch("Unknown", ["1", "2"], "token"), {"processed": 0, "failed": 2}
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:10
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from common.text import normalize_name
+
+
+def fill_normalized_names(apps, schema_editor):
+    Location = apps.get_model("locations", "Location")
+    objs = list(Location.objects.only("id", "name"))
+    for obj in objs:
+        obj.normalized_name = normalize_name(obj.name)
+    Location.objects.bulk_update(objs, ["normalized_name"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='aliases',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='normalized_name',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['aliases'], name='location_aliases_gin'),
+        ),
+        migrations.RunPython(fill_normalized_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:12
+
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_location_name_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='embedding',
+            field=pgvector.django.halfvec.HalfVectorField(dimensions=3072, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=pgvector.django.indexes.HnswIndex(fields=['embedding'], name='location_embedding_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-17 00:15
+
+import pgvector.django.halfvec
+from django.db import migrations
+
+
+# text-embedding-3 embeddings shortened to their leading dimensions and renormalized match what the API returns
+# for the shorter size, so existing rows are converted in place. Reverting clears them for embedding again.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0003_location_halfvec_embedding'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE locations_location ALTER COLUMN embedding TYPE halfvec(256) "
+                    "USING l2_normalize(subvector(embedding, 1, 256))",
+                    reverse_sql="ALTER TABLE locations_location ALTER COLUMN embedding TYPE halfvec(3072) USING NULL",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='location',
+                    name='embedding',
+                    field=pgvector.django.halfvec.HalfVectorField(dimensions=256, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -1,12 +1,14 @@
 from typing import Literal, Type, Optional, Dict, Any
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from pgvector.django import HalfVectorField
 from pydantic import Field, BaseModel
 
 from locations.enums import LocationLevel
-from common.models import TimedModel, EmbeddedModelLargeMixin
+from common.models import TimedModel, EmbeddedModelLargeMixin, NameIndexedMixin, embedding_index
 
 
-class Location(TimedModel, EmbeddedModelLargeMixin):
+class Location(NameIndexedMixin, TimedModel, EmbeddedModelLargeMixin):
     SCHEMA_FIELDS = ['name', 'level']
     class ModelBaseModel(BaseModel):
         name: str = Field(..., description="The name of the location in Title Case format")
@@ -16,6 +18,8 @@ class Location(TimedModel, EmbeddedModelLargeMixin):
     name = models.CharField(max_length=255)
     level = models.CharField(max_length=255, choices=LocationLevel.choices())
     parent = models.ForeignKey('self', on_delete=models.CASCADE, related_name='children', null=True, blank=True)
+    # Short names only need the leading dimensions of text-embedding-3-large.
+    embedding = HalfVectorField(dimensions=256, null=True)
     
     @classmethod
     def create_from_base_model(cls, base_model: ModelBaseModel, _: Optional[Dict[str, Any]] = None):
@@ -36,4 +40,8 @@ class Location(TimedModel, EmbeddedModelLargeMixin):
         verbose_name = 'Location'
         verbose_name_plural = 'Locations'
         unique_together = ('name', 'level')
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['aliases'], name='location_aliases_gin'),
+            embedding_index('location_embedding_hnsw'),
+        ]
\ No newline at end of file
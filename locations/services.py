@@ -8,7 +8,9 @@ from locations.models import Location
 class LocationService:
     def __init__(self):
         self.location_embedding_srv = EmbeddingService(Location)
-        self.cache_service = CacheService(prefix="location-service")
+        self.cache_service = CacheService(
+            prefix="location-service", local_cache_size=1024, store_pks=True, deferred_fields=["embedding"]
+        )
 
     def get_or_create_locations(self, location_names: List[str]) -> List[Location]:
         return self.location_embedding_srv.get_or_create_items(
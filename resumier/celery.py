@@ -0,0 +1,23 @@
+"""
+Celery config for resumier project.
+
+Tasks are discovered from the installed apps and configured from the ``CELERY_`` prefixed Django settings.
+"""
+
+import os
+
+from celery import Celery
+from celery.signals import worker_process_shutdown
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'resumier.settings')
+
+app = Celery('resumier')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def flush_traces_on_shutdown(**kwargs):
+    from common.tracing import flush_traces
+
+    flush_traces()
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     
     'rest_framework',
 
+    'common',
     'accounts',
     'locations',
     'companies',
@@ -106,6 +107,21 @@ CACHES = {
 }
 
 
+# Celery settings
+CELERY_BROKER_URL = os.environ.get(
+    'CELERY_BROKER_URL',
+    'amqp://{}:{}@rabbitmq:5672/{}'.format(
+        os.environ.get('RABBITMQ_DEFAULT_USER', 'guest'),
+        os.environ.get('RABBITMQ_DEFAULT_PASS', 'guest'),
+        os.environ.get('RABBITMQ_DEFAULT_VHOST', ''),
+    ),
+)
+# Chords (see jobs.tasks) need a result backend to collect the results of their header tasks.
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', os.environ.get('REDIS_LOCATION', 'redis://localhost:6379'))
+CELERY_RESULT_EXPIRES = 24 * 60 * 60
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -190,8 +206,25 @@ LLM_SETTINGS = {
     },
 }
 
+# How BulkLLMCaller runs concurrent LLM calls: "async" (one event loop) or "thread" (one thread per call)
+BULK_LLM_ENGINE = os.getenv("BULK_LLM_ENGINE", "async")
+
+# Requests and (estimated input) tokens per minute BulkLLMCaller may send to each LLM model, shared by all callers in
+# a worker process; split the provider quota between the worker processes. Unset or 0 disables the limit.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")) or None
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0")) or None
+
+# Agent observations are exported by common.tracing in the background. TRACE_SAMPLE_RATE is the share of them that
+# is kept (0 disables them); when the queue is full new observations are dropped.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "100"))
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "5"))
+
 LANGFUSE_CLIENT = Langfuse(
     public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
     secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
     host=os.getenv("LANGFUSE_HOST"),
+    flush_at=TRACE_BATCH_SIZE,
+    flush_interval=TRACE_FLUSH_INTERVAL,
 )
\ No newline at end of file